@@ -220,6 +220,22 @@ DATABASES = {
     }
 }
 
+# Shared by every worker process: versioned cache keys (front.caching) only work if a bump is seen by all of them.
+# Create the table once with `python manage.py createcachetable`.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'ionedu_cache',
+        # Django's default (300 entries) is passed after a few dozen page views, and every cull then drops a third
+        # of the table, version keys and the events flush lock included. Expired entries are removed first, so
+        # this limit only has to cover the live keys: versions, cards, pages, per-user sets and reaction state.
+        'OPTIONS': {
+            'MAX_ENTRIES': 1_000_000,
+            'CULL_FREQUENCY': 10,
+        },
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -35,6 +35,13 @@ class CustomUserAdmin(BaseUserAdmin, ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # A plain save() leaves the counters alone; write the ones edited here explicitly
+        edited = [field for field in CustomUser.COUNTER_FIELDS if field in form.changed_data]
+        if change and edited:
+            obj.save(update_fields=edited)
+
     @display(description="User Type", label=True)
     def display_user_type(self, obj):
         colors = {
@@ -108,7 +115,7 @@ class CourseAdmin(ModelAdmin):
 
     @display(description="Students")
     def display_student_count(self, obj):
-        return obj.students.count()
+        return obj.students_count
 
 
 # ============= LESSON =============
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FrontConfig(AppConfig):
     name = 'front'
+
+    def ready(self):
+        from . import signals  # noqa: F401
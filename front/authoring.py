@@ -0,0 +1,112 @@
+"""Test yaratish/tahrirlash: formani bir marta o'qish va o'zgarishlarni bulk so'rovlar bilan bitta tranzaksiyada yozish"""
+from django.db import transaction
+
+from .models import TestAnswer, TestQuestion
+
+
+def _number(value):
+    # Form numbers are compared as integers, so question 10 comes after question 9
+    return (0, int(value), '') if value.isdigit() else (1, 0, value)
+
+
+def _id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_questions(data):
+    """Formadagi savollar (tartib bo'yicha): [{'id', 'text', 'answers': [{'id', 'text', 'is_correct'}]}]
+
+    Form kalitlari bir marta ko'rib chiqiladi; javoblar formadagi tartibda qoladi.
+    """
+    texts = {}
+    answers = {}
+    for key in data.keys():
+        if key.startswith('question_text_'):
+            texts[key[len('question_text_'):]] = data.get(key)
+        elif key.startswith('answer_') and not key.startswith('answer_id_'):
+            q_num, _, answer_num = key[len('answer_'):].rpartition('_')
+            answers.setdefault(q_num, []).append(answer_num)
+
+    questions = []
+    for q_num in sorted(texts, key=_number):
+        if not texts[q_num]:
+            continue
+        correct = set(data.getlist(f'correct_answer_{q_num}'))
+        question_answers = []
+        for answer_num in answers.get(q_num, []):
+            answer_text = data.get(f'answer_{q_num}_{answer_num}')
+            if answer_text:
+                question_answers.append({
+                    'id': _id(data.get(f'answer_id_{q_num}_{answer_num}')),
+                    'text': answer_text,
+                    'is_correct': answer_num in correct,
+                })
+        questions.append({
+            'id': _id(data.get(f'question_id_{q_num}')),
+            'text': texts[q_num],
+            'answers': question_answers,
+        })
+    return questions
+
+
+def save_test(test, data):
+    """Test maydonlari, savollar va javoblarni saqlash - xatolikda hech narsa yozilmaydi"""
+    test.title = data.get('title')
+    test.description = data.get('description', '')
+    time_limit = data.get('time_limit_minutes')
+    test.time_limit_minutes = int(time_limit) if time_limit else None
+    test.passing_score = float(data.get('passing_score', 50))
+    questions = parse_questions(data)
+
+    with transaction.atomic():
+        test.save()
+
+        # Only rows of this test can be deleted or updated
+        deleted_questions = [pk for pk in map(_id, data.getlist('deleted_questions')) if pk]
+        deleted_answers = [pk for pk in map(_id, data.getlist('deleted_answers')) if pk]
+        if deleted_questions:
+            TestQuestion.objects.filter(test=test, id__in=deleted_questions).delete()
+        if deleted_answers:
+            TestAnswer.objects.filter(question__test=test, id__in=deleted_answers).delete()
+
+        existing_questions = {question.id: question for question in TestQuestion.objects.filter(test=test)}
+        existing_answers = {answer.id: answer for answer in TestAnswer.objects.filter(question__test=test)}
+
+        new_questions, changed_questions = [], []
+        for order, item in enumerate(questions, start=1):
+            question = existing_questions.get(item['id'])
+            if question is None:
+                question = TestQuestion(test=test, order=order, question_text=item['text'])
+                new_questions.append(question)
+            else:
+                question.order = order
+                question.question_text = item['text']
+                changed_questions.append(question)
+            item['question'] = question
+
+        TestQuestion.objects.bulk_create(new_questions)
+        TestQuestion.objects.bulk_update(changed_questions, ['order', 'question_text'])
+
+        new_answers, changed_answers = [], []
+        for item in questions:
+            question = item['question']
+            for order, answer_item in enumerate(item['answers'], start=1):
+                answer = existing_answers.get(answer_item['id'])
+                if answer is None or answer.question_id != question.id:
+                    new_answers.append(TestAnswer(
+                        question=question, order=order,
+                        answer_text=answer_item['text'], is_correct=answer_item['is_correct'],
+                    ))
+                else:
+                    answer.order = order
+                    answer.answer_text = answer_item['text']
+                    answer.is_correct = answer_item['is_correct']
+                    changed_answers.append(answer)
+
+        TestAnswer.objects.bulk_create(new_answers)
+        TestAnswer.objects.bulk_update(changed_answers, ['order', 'answer_text', 'is_correct'])
+
+    return test
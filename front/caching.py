@@ -0,0 +1,141 @@
+"""Versiyalangan kesh: kurs kartochkalari va katalog JSON sahifalari"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+CARD_TIMEOUT = 60 * 60
+PAGE_TIMEOUT = 5 * 60
+
+CATALOG = 'catalog'
+
+
+def _version_key(namespace, obj_id=None):
+    return f'ver:{namespace}' if obj_id is None else f'ver:{namespace}:{obj_id}'
+
+
+def _changed_key(namespace, obj_id=None):
+    return f'changed:{namespace}' if obj_id is None else f'changed:{namespace}:{obj_id}'
+
+
+def _initial_version():
+    # Starting from the clock (not 1) means an evicted version key never reuses an old number
+    return int(time.time() * 1000)
+
+
+def get_version(namespace, obj_id=None):
+    """Joriy versiya raqami (yo'q bo'lsa yaratiladi)"""
+    key = _version_key(namespace, obj_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(namespace, obj_ids):
+    """Bir nechta obyekt versiyalarini bitta so'rov bilan olish: {id: version}"""
+    keys = {_version_key(namespace, obj_id): obj_id for obj_id in obj_ids}
+    found = cache.get_many(keys.keys())
+    versions = {}
+    for key, obj_id in keys.items():
+        versions[obj_id] = found[key] if key in found else get_version(namespace, obj_id)
+    return versions
+
+
+def bump_version(namespace, obj_id=None):
+    """Versiyani oshirish - eski kalitlar o'z-o'zidan eskiradi"""
+    key = _version_key(namespace, obj_id)
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+        cache.set(_changed_key(namespace, obj_id), timezone.now().replace(microsecond=0), None)
+
+    # Bump after commit, so nobody re-caches pre-commit data under the new version
+    transaction.on_commit(bump)
+
+
+def versioned_key(prefix, namespace, *params):
+    """Parametrlar va `namespace` versiyasidan iborat kesh kaliti"""
+    digest = hashlib.md5('\x1f'.join(str(p or '') for p in params).encode()).hexdigest()
+    return f'{prefix}:{get_version(namespace)}:{digest}'
+
+
+def get_changed_at(namespace, obj_id=None):
+    """Oxirgi versiya oshirilgan vaqt (Last-Modified uchun), noma'lum bo'lsa None"""
+    return cache.get(_changed_key(namespace, obj_id))
+
+
+# ---- Course cards ----
+
+def course_card(course):
+    """Katalog uchun kurs kartochkasi ma'lumotlari"""
+    teacher = course.teacher
+    return {
+        'id': course.id,
+        'title': course.title,
+        'description': course.excerpt,
+        'subject': course.subject,
+        'grade': course.grade,
+        'background_image': course.background_image.url if course.background_image else None,
+        'teacher': {
+            'name': teacher.get_full_name(),
+            'initials': f"{teacher.first_name[0]}{teacher.last_name[0]}" if teacher.first_name and teacher.last_name else teacher.username[0:2].upper()
+        },
+        'students_count': course.students_count,
+        'lessons_count': course.lessons_count
+    }
+
+
+def _card_key(course_id, version):
+    return f'course:card:{course_id}:{version}'
+
+
+def get_cards(course_ids, load_courses):
+    """Kartochkalarni keshdan olish; yo'qlarini `load_courses(ids)` orqali to'ldirish"""
+    versions = get_versions('course', course_ids)
+    keys = {_card_key(course_id, versions[course_id]): course_id for course_id in course_ids}
+    found = cache.get_many(keys.keys())
+    cards = {keys[key]: card for key, card in found.items()}
+
+    missing = [course_id for course_id in course_ids if course_id not in cards]
+    if missing:
+        fresh = {course.id: course_card(course) for course in load_courses(missing)}
+        cache.set_many({_card_key(course_id, versions[course_id]): card for course_id, card in fresh.items()}, CARD_TIMEOUT)
+        cards.update(fresh)
+
+    return [cards[course_id] for course_id in course_ids if course_id in cards], versions
+
+
+# ---- Catalog JSON pages ----
+
+def catalog_page_key(*params):
+    """Filtrlar va cursor bo'yicha sahifa kaliti (katalog versiyasi bilan)"""
+    return versioned_key('catalog:page', CATALOG, *params)
+
+
+def get_page(key):
+    """Keshdagi sahifa: (course_ids, next_cursor, payload) yoki None.
+
+    payload faqat sahifadagi barcha kurs versiyalari o'zgarmagan bo'lsa qaytariladi.
+    """
+    page = cache.get(key)
+    if page is None:
+        return None
+    course_ids = page['ids']
+    payload = page['payload'] if get_versions('course', course_ids) == page['versions'] else None
+    return course_ids, page['next_cursor'], payload
+
+
+def set_page(key, course_ids, next_cursor, versions, payload):
+    cache.set(key, {
+        'ids': course_ids,
+        'next_cursor': next_cursor,
+        'versions': versions,
+        'payload': payload,
+    }, PAGE_TIMEOUT)
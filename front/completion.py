@@ -0,0 +1,99 @@
+"""Kurs bo'yicha yakunlangan darslar to'plami (user, course) - keshda saralangan id ro'yxati sifatida"""
+import bisect
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import caching
+from .models import LessonProgress
+
+COMPLETION_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def _key(user_id, course_id, version):
+    return f'completion:{course_id}:{version}:{user_id}'
+
+
+def _load(pairs):
+    """Yo'q to'plamlarni bitta so'rov bilan olish: {(user_id, course_id): [lesson ids]}"""
+    user_ids = {user_id for user_id, _ in pairs}
+    course_ids = {course_id for _, course_id in pairs}
+    completed = {pair: [] for pair in pairs}
+    rows = LessonProgress.objects.filter(
+        user_id__in=user_ids, lesson__course_id__in=course_ids, is_completed=True
+    ).values_list('user_id', 'lesson__course_id', 'lesson_id')
+    for user_id, course_id, lesson_id in rows:
+        if (user_id, course_id) in completed:
+            completed[user_id, course_id].append(lesson_id)
+    for lesson_ids in completed.values():
+        lesson_ids.sort()
+    return completed
+
+
+def get_many(pairs):
+    """Bir nechta (user_id, course_id) uchun yakunlangan darslar: {(user_id, course_id): [lesson ids]}"""
+    pairs = list(dict.fromkeys(pairs))
+    versions = caching.get_versions('completion', {course_id for _, course_id in pairs})
+    keys = {_key(user_id, course_id, versions[course_id]): (user_id, course_id) for user_id, course_id in pairs}
+    found = cache.get_many(keys.keys())
+    completed = {keys[key]: lesson_ids for key, lesson_ids in found.items()}
+
+    missing = [pair for pair in pairs if pair not in completed]
+    if missing:
+        fresh = _load(missing)
+        cache.set_many({
+            _key(user_id, course_id, versions[course_id]): lesson_ids
+            for (user_id, course_id), lesson_ids in fresh.items()
+        }, COMPLETION_TIMEOUT)
+        completed.update(fresh)
+
+    return completed
+
+
+def get_completed(user_id, course_id):
+    """Foydalanuvchining kursdagi yakunlangan darslari (saralangan id ro'yxati)"""
+    return get_many([(user_id, course_id)])[user_id, course_id]
+
+
+def add(user_id, course_id, lesson_id):
+    """Dars yakunlanganda keshdagi to'plamni joyida yangilash"""
+    def update():
+        key = _key(user_id, course_id, caching.get_version('completion', course_id))
+        lesson_ids = cache.get(key)
+        if lesson_ids is None:
+            return  # Nothing cached - the next read loads it from the database
+        index = bisect.bisect_left(lesson_ids, lesson_id)
+        if index == len(lesson_ids) or lesson_ids[index] != lesson_id:
+            lesson_ids.insert(index, lesson_id)
+            cache.set(key, lesson_ids, COMPLETION_TIMEOUT)
+
+    transaction.on_commit(update)
+
+
+def invalidate_course(course_id):
+    """Kursning barcha to'plamlarini eskirtirish (masalan, dars o'chirilganda)"""
+    caching.bump_version('completion', course_id)
+
+
+def percent(completed_count, total):
+    if not total:
+        return 0
+    return min(100, int(completed_count / total * 100))
+
+
+def outline_progress(lesson_ids, course_outline):
+    """Mundarijadagi darslar bo'yicha foiz - o'chirilgan darslar hisobga olinmaydi"""
+    done = sum(1 for lesson_id in lesson_ids if course_outline.position(lesson_id) is not None)
+    return percent(done, len(course_outline))
+
+
+def attach(enrollments):
+    """CourseStudent yozuvlariga `progress` (foiz) qo'shish; o'rtacha foizni qaytarish"""
+    enrollments = list(enrollments)
+    completed = get_many([(enrollment.user_id, enrollment.course_id) for enrollment in enrollments])
+    for enrollment in enrollments:
+        lesson_ids = completed[enrollment.user_id, enrollment.course_id]
+        enrollment.progress = percent(len(lesson_ids), enrollment.course.lessons_count)
+    if not enrollments:
+        return 0
+    return round(sum(enrollment.progress for enrollment in enrollments) / len(enrollments))
@@ -0,0 +1,51 @@
+"""Shartli GET (ETag / Last-Modified) - keshdagi versiyalardan, sahifa so'rovlarisiz (faqat kesh jadvali o'qiladi)"""
+import hashlib
+
+from django.contrib import messages
+
+from . import caching
+
+
+def _has_pending_messages(request):
+    # A 304 would swallow flash messages, so such responses are always rendered
+    return len(messages.get_messages(request)) > 0
+
+
+def _etag(request, namespace, obj_id):
+    if not request.user.is_authenticated or _has_pending_messages(request):
+        return None
+    # Pages show the current user's name and enrollment state, so the tag is per user.
+    # They also embed a CSRF token, which rotates on login together with the session key,
+    # so a copy cached before a re-login (with a dead token) is never revalidated.
+    raw = (
+        f'{namespace}:{obj_id}:{caching.get_version(namespace, obj_id)}:'
+        f'{request.user.pk}:{request.user.get_full_name()}:{request.session.session_key}'
+    )
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _last_modified(request, namespace, obj_id):
+    if _has_pending_messages(request):
+        return None
+    return caching.get_changed_at(namespace, obj_id)
+
+
+def course_etag(request, course_id):
+    return _etag(request, 'course', course_id)
+
+
+def course_last_modified(request, course_id):
+    return _last_modified(request, 'course', course_id)
+
+
+def teacher_etag(request, teacher_id):
+    return _etag(request, 'teacher', teacher_id)
+
+
+def teacher_last_modified(request, teacher_id):
+    return _last_modified(request, 'teacher', teacher_id)
+
+
+def payload_etag(payload):
+    """Tayyor JSON javob uchun ETag"""
+    return hashlib.md5(payload.encode()).hexdigest()
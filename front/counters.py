@@ -0,0 +1,51 @@
+"""Course va Lesson jadvallaridagi denormalizatsiya qilingan hisoblagichlar"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Course, CourseStudent, CourseTest, Lesson, LessonLikeDislike
+
+# Counter field on Course -> model whose rows it counts (each has a `course` FK)
+COUNTERS = {
+    'students_count': CourseStudent,
+    'lessons_count': Lesson,
+    'tests_count': CourseTest,
+    'comments_count': Comment,
+}
+
+
+def clamped(field, delta):
+    """`field + delta` ifodasi, noldan pastga tushmaydi (hisoblagich siljigan bo'lsa ham)"""
+    return Greatest(F(field) + delta, Value(0))
+
+
+def increment(course_id, field, delta=1):
+    """Hisoblagichni atomik tarzda o'zgartirish (F() bilan)"""
+    Course.objects.filter(pk=course_id).update(**{field: clamped(field, delta)})
+
+
+def _count_subquery(model):
+    counts = model.objects.filter(course=OuterRef('pk')).order_by().values('course').annotate(
+        total=Count('pk')
+    ).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+def rebuild(queryset=None):
+    """Hisoblagichlarni jadvallardan qayta hisoblash"""
+    if queryset is None:
+        queryset = Course.objects.all()
+    return queryset.update(**{field: _count_subquery(model) for field, model in COUNTERS.items()})
+
+
+def _reaction_subquery(is_like):
+    counts = LessonLikeDislike.objects.filter(lesson=OuterRef('pk'), is_like=is_like).order_by().values('lesson').annotate(
+        total=Count('pk')
+    ).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+def rebuild_lessons(queryset=None):
+    """Darslarning like/dislike hisoblagichlarini qayta hisoblash"""
+    if queryset is None:
+        queryset = Lesson.objects.all()
+    return queryset.update(likes_count=_reaction_subquery(True), dislikes_count=_reaction_subquery(False))
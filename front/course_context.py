@@ -0,0 +1,74 @@
+"""Kurs sahifasi konteksti - ko'pi bilan 2 ta so'rov bilan"""
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django.http import Http404
+
+from .models import Course, CourseStudent, Lesson
+
+# Queries build_course_context() may issue: the course row and its lessons
+QUERY_BUDGET = 2
+
+ENROLLMENT_TIMEOUT = 60 * 60
+
+
+def _enrollment_key(user_id, course_id):
+    return f'enrolled:{user_id}:{course_id}'
+
+
+def get_enrollment(user_id, course_id):
+    """Keshdagi yozilish holati: True, yoki noma'lum bo'lsa None"""
+    return cache.get(_enrollment_key(user_id, course_id))
+
+
+def set_enrollment(user_id, course_id, enrolled):
+    # Only "enrolled" is cached: a cached "no" could outlive the enrollment in a worker that never sees it,
+    # and a read racing the enrollment commit could overwrite the fresh "yes"
+    if enrolled:
+        cache.set(_enrollment_key(user_id, course_id), True, ENROLLMENT_TIMEOUT)
+    else:
+        forget_enrollment(user_id, course_id)
+
+
+def forget_enrollment(user_id, course_id):
+    cache.delete(_enrollment_key(user_id, course_id))
+
+
+def is_enrolled(user, course_id):
+    """Foydalanuvchi kursga yozilganmi (keshdan, bo'lmasa bitta EXISTS so'rovi)"""
+    enrolled = get_enrollment(user.pk, course_id)
+    if enrolled is None:
+        enrolled = CourseStudent.objects.filter(user=user, course_id=course_id).exists()
+        set_enrollment(user.pk, course_id, enrolled)
+    return enrolled
+
+
+def build_course_context(course_id, user):
+    """course_detail uchun kontekst: kurs (hisoblagichlari bilan) va darslar ro'yxati"""
+    courses = Course.objects.filter(id=course_id, type=Course.TYPE_OPEN).select_related('teacher', 'category').defer('search_vector')
+
+    # The enrollment flag rides along with the course query when it is not cached yet
+    enrolled = get_enrollment(user.pk, course_id)
+    if enrolled is None:
+        courses = courses.annotate(
+            is_enrolled=Exists(CourseStudent.objects.filter(user=user, course=OuterRef('pk')))
+        )
+
+    course = courses.first()
+    if course is None:
+        raise Http404('Kurs topilmadi')
+
+    if enrolled is None:
+        enrolled = course.is_enrolled
+        set_enrollment(user.pk, course_id, enrolled)
+
+    lessons = list(
+        Lesson.objects.filter(course_id=course.id).only('id', 'course_id', 'order', 'title', 'video_url').order_by('order')
+    )
+
+    return {
+        'course': course,
+        'lessons': lessons,
+        'is_enrolled': enrolled,
+        'students_count': course.students_count,
+        'lessons_count': course.lessons_count,
+    }
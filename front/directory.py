@@ -0,0 +1,48 @@
+"""O'qituvchilar katalogi sarlavhasi: umumiy statistika bitta keshdagi snapshotdan"""
+from django.core.cache import cache
+from django.db.models import Avg, Count
+
+from . import caching
+from .models import Course, CustomUser, UserType
+
+DIRECTORY = 'teachers'
+# Backstop for changes no signal sees (e.g. queryset updates)
+STATS_TIMEOUT = 10 * 60
+
+
+def _key():
+    return f'teachers:stats:{caching.get_version(DIRECTORY)}'
+
+
+def invalidate():
+    """O'qituvchi yoki kurs o'zgarganda"""
+    caching.bump_version(DIRECTORY)
+
+
+def compute_stats():
+    teachers = CustomUser.objects.filter(user_type=UserType.TEACHER)
+    totals = teachers.aggregate(
+        total=Count('id'),
+        avg_rating=Avg('rating'),
+        avg_experience=Avg('experience_years'),
+    )
+    specializations = sorted(set(
+        teachers.exclude(specialization__isnull=True).exclude(specialization='').values_list('specialization', flat=True)
+    ))
+    return {
+        'total_teachers': totals['total'],
+        'total_courses': Course.objects.filter(teacher__user_type=UserType.TEACHER).count(),
+        'avg_rating': round(totals['avg_rating'] or 0, 1),
+        'avg_experience': round(totals['avg_experience'] or 0, 1),
+        'specializations': specializations,
+    }
+
+
+def get_stats():
+    """Snapshot - keshdan, katalog versiyasi o'zgarganda qayta hisoblanadi"""
+    key = _key()
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats()
+        cache.set(key, stats, STATS_TIMEOUT)
+    return stats
@@ -0,0 +1,197 @@
+"""Reaksiya va dars ko'rishlari uchun write-behind bufer.
+
+Har bir bosish bazaga darhol yozilmaydi: (user, lesson) uchun faqat yakuniy holat va darslar bo'yicha
+ko'rishlar soni jarayon xotirasida yig'iladi va fon taymeri bilan FLUSH_INTERVAL da bir marta bulk so'rovlar
+bilan yoziladi. Foydalanuvchining o'z holati keshda ham saqlanadi - boshqa jarayonlar ham uni darhol ko'radi.
+"""
+import atexit
+import logging
+import threading
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import F
+
+from . import reactions
+from .models import Lesson
+
+FLUSH_INTERVAL = 5  # seconds
+MAX_PENDING = 1000  # flush early when this many events are waiting
+PENDING_TIMEOUT = 10 * 60
+FLUSH_LOCK_KEY = 'events:flush-lock'
+
+logger = logging.getLogger(__name__)
+
+_NONE = 'none'  # cached marker for "no reaction" (None means "not cached")
+_MISSING = object()
+
+
+def _reaction_key(user_id, lesson_id):
+    return f'events:reaction:{user_id}:{lesson_id}'
+
+
+class EventBuffer:
+    """Jarayon ichidagi kutilayotgan hodisalar"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reactions = {}   # (user_id, lesson_id) -> True/False/None, the final state to write
+        self.deltas = {}      # lesson_id -> {True: n, False: n}, for reading counters before a flush
+        self.views = {}       # lesson_id -> views not yet written
+        self.timer = None
+
+    def pending(self):
+        return len(self.reactions) + len(self.views)
+
+    def take(self):
+        """Kutilayotgan hodisalarni olib, buferni bo'shatish"""
+        with self.lock:
+            taken = self.reactions, self.deltas, self.views
+            self.reactions, self.deltas, self.views = {}, {}, {}
+        return taken
+
+    def schedule(self):
+        """Fon flush taymerini ishga tushirish (chaqiruvchi `lock` ni ushlab turadi)"""
+        if self.timer is None:
+            self.timer = threading.Timer(FLUSH_INTERVAL, _background_flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def restore(self, states, deltas, views):
+        """Yozib bo'lmagan hodisalarni qaytarish - keyingi bosishlar ustun"""
+        with self.lock:
+            for pair, is_like in states.items():
+                self.reactions.setdefault(pair, is_like)
+            for lesson_id, lesson_deltas in deltas.items():
+                current = self.deltas.setdefault(lesson_id, {True: 0, False: 0})
+                for is_like, delta in lesson_deltas.items():
+                    current[is_like] += delta
+            for lesson_id, count in views.items():
+                self.views[lesson_id] = self.views.get(lesson_id, 0) + count
+
+
+_buffer = EventBuffer()
+
+
+def _pending_reaction(user_id, lesson_id):
+    """Kutilayotgan holat (bufer yoki kesh), bo'lmasa _MISSING"""
+    state = _buffer.reactions.get((user_id, lesson_id), _MISSING)
+    if state is not _MISSING:
+        return state
+    cached = cache.get(_reaction_key(user_id, lesson_id))
+    if cached is None:
+        return _MISSING
+    return None if cached == _NONE else cached
+
+
+def user_reaction(user_id, lesson_id, stored):
+    """Foydalanuvchi reaksiyasi - kutilayotgan holat bazadagidan (`stored`) ustun"""
+    state = _pending_reaction(user_id, lesson_id)
+    return stored if state is _MISSING else state
+
+
+def toggle_reaction(user_id, lesson_id, is_like):
+    """Like/dislike bosilishini buferga yozish; yangi holatni qaytarish"""
+    pair = (user_id, lesson_id)
+    known = _pending_reaction(user_id, lesson_id)
+    stored = reactions.current_reactions([pair]).get(pair) if known is _MISSING else known
+
+    with _buffer.lock:
+        before = _buffer.reactions.get(pair, stored)
+        after = reactions.toggled(before, is_like)
+        _buffer.reactions[pair] = after
+
+        lesson_deltas = _buffer.deltas.setdefault(lesson_id, {True: 0, False: 0})
+        if before is not None:
+            lesson_deltas[before] -= 1
+        if after is not None:
+            lesson_deltas[after] += 1
+        _buffer.schedule()
+
+    cache.set(_reaction_key(user_id, lesson_id), _NONE if after is None else after, PENDING_TIMEOUT)
+    flush_if_due()
+    return after
+
+
+def record_view(lesson_id):
+    """Dars ko'rilganini buferga yozish"""
+    with _buffer.lock:
+        _buffer.views[lesson_id] = _buffer.views.get(lesson_id, 0) + 1
+        _buffer.schedule()
+    flush_if_due()
+
+
+def lesson_counts(lesson):
+    """Bazadagi hisoblagichlar + shu jarayonda hali yozilmagan o'zgarishlar"""
+    lesson_deltas = _buffer.deltas.get(lesson.id, {True: 0, False: 0})
+    return {
+        'likes_count': max(0, lesson.likes_count + lesson_deltas[True]),
+        'dislikes_count': max(0, lesson.dislikes_count + lesson_deltas[False]),
+        'views_count': lesson.views_count + _buffer.views.get(lesson.id, 0),
+    }
+
+
+def _latest_states(states):
+    """Har bir juftlik uchun eng oxirgi bosish - umumiy keshdan (boshqa jarayon keyinroq bosgan bo'lishi mumkin)"""
+    keys = {_reaction_key(user_id, lesson_id): (user_id, lesson_id) for user_id, lesson_id in states}
+    latest = dict(states)
+    for key, cached in cache.get_many(keys.keys()).items():
+        latest[keys[key]] = None if cached == _NONE else cached
+    return latest
+
+
+def flush_if_due():
+    """Bufer to'lib ketsa, taymerni kutmasdan yozish"""
+    if _buffer.pending() >= MAX_PENDING:
+        flush()
+
+
+def flush():
+    """Buferni bazaga yozish: reaksiyalar bulk_create/bulk_update bilan, ko'rishlar bitta bulk_update bilan"""
+    if not _buffer.pending():
+        return 0
+    # Only one flush at a time across processes; the timeout frees the lock if a worker dies mid-flush
+    if not cache.add(FLUSH_LOCK_KEY, 1, 60):
+        return 0
+
+    states, deltas, views = _buffer.take()
+    try:
+        with transaction.atomic():
+            # Workers buffering the same pair all write its latest state, so flush order does not matter
+            written = reactions.apply(_latest_states(states))
+            lessons = []
+            for lesson_id, count in views.items():
+                lesson = Lesson(pk=lesson_id)
+                lesson.views_count = F('views_count') + count
+                lessons.append(lesson)
+            Lesson.objects.bulk_update(lessons, ['views_count'])
+    except Exception:
+        _buffer.restore(states, deltas, views)
+        raise
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+    return written + len(views)
+
+
+def _background_flush():
+    try:
+        flush()
+    except Exception:
+        logger.exception('Event buffer flush failed')
+    finally:
+        # The timer thread has its own database connection
+        connections.close_all()
+        with _buffer.lock:
+            _buffer.timer = None
+            # Left over if another process held the flush lock, or if the flush failed
+            if _buffer.pending():
+                _buffer.schedule()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush()
+    except Exception:
+        pass  # The database may already be gone at interpreter shutdown
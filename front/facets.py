@@ -0,0 +1,96 @@
+"""Katalog fasetlari: kategoriya va sinf bo'yicha ochiq kurslar soni"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from . import caching
+from .counters import clamped
+from .models import Course, CourseFacet
+
+ROWS_KEY = 'facets:rows'
+SEARCH_TIMEOUT = 5 * 60
+
+GRADES = [str(i) for i in range(1, 12)]
+
+
+def facet_key(type_, category_id, grade):
+    """Kurs qaysi (kategoriya, sinf) katagiga tushadi - yopiq kurslar hisoblanmaydi"""
+    if type_ != Course.TYPE_OPEN:
+        return None
+    return category_id, grade or ''
+
+
+def course_facet_key(course):
+    return facet_key(course.type, course.category_id, course.grade)
+
+
+def _changed():
+    transaction.on_commit(lambda: cache.delete(ROWS_KEY))
+
+
+def adjust(key, delta):
+    """Katak hisoblagichini F() bilan o'zgartirish"""
+    if key is None:
+        return
+    category_id, grade = key
+    facets = CourseFacet.objects.filter(category_id=category_id, grade=grade)
+    if not facets.update(count=clamped('count', delta)) and delta > 0:
+        facet, created = CourseFacet.objects.get_or_create(category_id=category_id, grade=grade, defaults={'count': delta})
+        if not created:
+            facets.update(count=clamped('count', delta))
+    _changed()
+
+
+def rebuild():
+    """Fasetlar jadvalini kurslardan qayta qurish"""
+    rows = Course.objects.filter(type=Course.TYPE_OPEN).order_by().values('category_id', 'grade').annotate(total=Count('id'))
+    totals = {}
+    for row in rows:
+        key = (row['category_id'], row['grade'] or '')
+        totals[key] = totals.get(key, 0) + row['total']
+
+    with transaction.atomic():
+        CourseFacet.objects.all().delete()
+        CourseFacet.objects.bulk_create([
+            CourseFacet(category_id=category_id, grade=grade, count=total)
+            for (category_id, grade), total in totals.items()
+        ])
+    _changed()
+    return len(totals)
+
+
+def _table_rows():
+    rows = cache.get(ROWS_KEY)
+    if rows is None:
+        rows = list(CourseFacet.objects.filter(count__gt=0).values_list('category_id', 'grade', 'count'))
+        cache.set(ROWS_KEY, rows, None)
+    return rows
+
+
+def _search_rows(queryset, search_query):
+    key = caching.versioned_key('facets:search', caching.CATALOG, search_query)
+    rows = cache.get(key)
+    if rows is None:
+        grouped = queryset.order_by().values('category_id', 'grade').annotate(total=Count('id', distinct=True))
+        rows = [(row['category_id'], row['grade'] or '', row['total']) for row in grouped]
+        cache.set(key, rows, SEARCH_TIMEOUT)
+    return rows
+
+
+def get_facets(queryset=None, search_query='', category_id='', grade=''):
+    """Kategoriya va sinf bo'yicha sonlar: {'categories': {id: n}, 'grades': {grade: n}}
+
+    Qidiruvsiz - oldindan hisoblangan jadvaldan; qidiruv bilan - natijalar bo'yicha GROUP BY (keshlanadi).
+    Har bir faset qolgan filtrni hisobga oladi, lekin o'zinikini emas.
+    """
+    rows = _search_rows(queryset, search_query) if search_query else _table_rows()
+
+    categories = {}
+    grades = {}
+    for row_category, row_grade, total in rows:
+        if not grade or row_grade == grade:
+            categories[row_category] = categories.get(row_category, 0) + total
+        if not category_id or str(row_category) == str(category_id):
+            grades[row_grade] = grades.get(row_grade, 0) + total
+
+    return {'categories': categories, 'grades': grades}
@@ -0,0 +1,93 @@
+"""Testlarni baholash: har bir CourseTest uchun keshlangan javoblar kaliti"""
+import bisect
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import caching
+from .models import StudentAnswer, TestAnswer, TestQuestion
+
+ANSWER_KEY_TIMEOUT = 24 * 60 * 60
+
+# Minimum score for 1, 2, 3, 4 and 5 stars
+STAR_THRESHOLDS = (50, 60, 70, 80, 90)
+
+
+def _key(test_id):
+    return f'answer_key:{test_id}:{caching.get_version("answer_key", test_id)}'
+
+
+def build_answer_key(test_id):
+    """{question_id: (savolning barcha javob id lari, to'g'ri javob id lari)} - 2 ta so'rov"""
+    answer_key = {
+        question_id: (set(), set())
+        for question_id in TestQuestion.objects.filter(test_id=test_id).values_list('id', flat=True)
+    }
+    answers = TestAnswer.objects.filter(question__test_id=test_id).values_list('question_id', 'id', 'is_correct')
+    for question_id, answer_id, is_correct in answers:
+        all_ids, correct_ids = answer_key[question_id]
+        all_ids.add(answer_id)
+        if is_correct:
+            correct_ids.add(answer_id)
+    return {question_id: (frozenset(all_ids), frozenset(correct_ids)) for question_id, (all_ids, correct_ids) in answer_key.items()}
+
+
+def get_answer_key(test_id):
+    """Javoblar kaliti - keshdan, bo'lmasa bazadan quriladi"""
+    key = _key(test_id)
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = build_answer_key(test_id)
+        cache.set(key, answer_key, ANSWER_KEY_TIMEOUT)
+    return answer_key
+
+
+def invalidate(test_id):
+    """Test savollari yoki javoblari o'zgarganda"""
+    caching.bump_version('answer_key', test_id)
+
+
+def selected_answers(answer_key, data):
+    """Formadan tanlangan javoblar: {question_id: answer_id} - faqat shu savolga tegishli javoblar"""
+    selected = {}
+    for question_id, (all_ids, _) in answer_key.items():
+        value = data.get(f'question_{question_id}')
+        try:
+            answer_id = int(value)
+        except (TypeError, ValueError):
+            continue
+        if answer_id in all_ids:
+            selected[question_id] = answer_id
+    return selected
+
+
+def grade(answer_key, selected):
+    """To'g'ri javoblar soni - bazaga murojaatsiz"""
+    return sum(1 for question_id, answer_id in selected.items() if answer_id in answer_key[question_id][1])
+
+
+def correct_count(student_test, answer_key):
+    """Yakunlangan urinishdagi to'g'ri javoblar soni - saqlangan javoblardan (ular yo'q eski urinishlarda balldan)"""
+    rows = list(student_test.answers.filter(answer__isnull=False).values_list('question_id', 'answer_id'))
+    if not rows:
+        return round((student_test.score or 0) / 100 * len(answer_key))
+    return grade(answer_key, {question_id: answer_id for question_id, answer_id in rows if question_id in answer_key})
+
+
+def score_for(correct_answers, total_questions):
+    return (correct_answers / total_questions * 100) if total_questions > 0 else 0
+
+
+def stars_for(score):
+    """Ball uchun yulduzlar soni (0-5)"""
+    return bisect.bisect_right(STAR_THRESHOLDS, score)
+
+
+def record_answers(student_test, selected):
+    """Tanlangan javoblarni saqlash (qayta topshirishda eskilari almashtiriladi)"""
+    with transaction.atomic():
+        StudentAnswer.objects.filter(student_test=student_test).delete()
+        StudentAnswer.objects.bulk_create([
+            StudentAnswer(student_test=student_test, question_id=question_id, answer_id=answer_id)
+            for question_id, answer_id in selected.items()
+        ])
@@ -0,0 +1,129 @@
+"""Test savollari tahlili: qiyinlik (p-value), point-biserial ajratish va javoblar tanlanish ulushi.
+
+Barcha urinishlar bitta (urinish x savol) matritsaga yuklanadi va NumPy bilan hisoblanadi. Hech narsa
+belgilanmagan urinishlar hamma savolga xato deb olinadi; javoblari saqlanmagan eski urinishlar chiqarib tashlanadi.
+Natija yangi topshiriq yoki test tahrirlanmaguncha keshda turadi.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from . import caching
+from .models import StudentAnswer, StudentTest, TestAnswer, TestQuestion
+
+ANALYSIS_TIMEOUT = 24 * 60 * 60
+
+# Rule-of-thumb bands for flagging questions
+TOO_EASY = 0.9
+TOO_HARD = 0.2
+LOW_DISCRIMINATION = 0.2
+
+
+def _key(test_id):
+    versions = (caching.get_version('attempts', test_id), caching.get_version('answer_key', test_id))
+    return f'item_analysis:{test_id}:{versions[0]}:{versions[1]}'
+
+
+def attempts_changed(test_id):
+    """Yangi topshiriq yakunlanganda yoki natijalar qayta baholanganda"""
+    caching.bump_version('attempts', test_id)
+
+
+def _point_biserial(correct, totals):
+    """Har bir savol uchun savol (0/1) va qolgan ball (umumiy - shu savol) orasidagi korrelyatsiya"""
+    rest = totals[:, None] - correct
+    item_std = correct.std(axis=0)
+    rest_std = rest.std(axis=0)
+    covariance = (correct * rest).mean(axis=0) - correct.mean(axis=0) * rest.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = covariance / (item_std * rest_std)
+    return np.where((item_std > 0) & (rest_std > 0), r, np.nan)
+
+
+def analyze(test_id):
+    """Savollar bo'yicha statistika: {'attempts': n, 'excluded': n, 'questions': [...]}"""
+    questions = list(TestQuestion.objects.filter(test_id=test_id).order_by('order', 'id').values_list('id', 'question_text'))
+    answers = list(TestAnswer.objects.filter(question__test_id=test_id).order_by('order', 'id').values_list(
+        'id', 'question_id', 'answer_text', 'is_correct'
+    ))
+    attempts = StudentTest.objects.filter(course_test_id=test_id, completed=True).annotate(
+        answered=Exists(StudentAnswer.objects.filter(student_test=OuterRef('pk')))
+    ).values_list('id', 'score', 'answered')
+    # Without responses a positive score predates stored answers; a zero score means nothing was answered
+    included = sorted(attempt_id for attempt_id, score, answered in attempts if answered or not score)
+    excluded = len(attempts) - len(included)
+    responses = np.array(list(StudentAnswer.objects.filter(
+        student_test__course_test_id=test_id, student_test__completed=True, answer__isnull=False
+    ).values_list('student_test_id', 'question_id', 'answer_id')), dtype=np.int64).reshape(-1, 3)
+
+    question_index = {question_id: i for i, (question_id, _) in enumerate(questions)}
+    answer_index = {answer_id: i for i, (answer_id, *_) in enumerate(answers)}
+    answer_correct = np.array([is_correct for *_, is_correct in answers], dtype=bool)
+
+    attempt_ids = np.array(included, dtype=np.int64)
+
+    # Responses to questions or answers deleted since the attempt are ignored
+    keep = np.array([
+        question_id in question_index and answer_id in answer_index for _, question_id, answer_id in responses.tolist()
+    ], dtype=bool) & np.isin(responses[:, 0], attempt_ids)
+    responses = responses[keep]
+
+    attempt_slots = np.searchsorted(attempt_ids, responses[:, 0])
+    question_slots = np.array([question_index[question_id] for question_id in responses[:, 1].tolist()], dtype=np.int64)
+    answer_slots = np.array([answer_index[answer_id] for answer_id in responses[:, 2].tolist()], dtype=np.int64)
+    n_attempts, n_questions = len(attempt_ids), len(questions)
+
+    # Attempt x question matrix: 1 where the chosen answer is correct (unanswered counts as wrong)
+    correct = np.zeros((n_attempts, n_questions), dtype=np.float64)
+    correct[attempt_slots, question_slots] = answer_correct[answer_slots]
+    totals = correct.sum(axis=1)
+
+    if n_attempts:
+        p_values = correct.mean(axis=0)
+        discrimination = _point_biserial(correct, totals)
+        selection_rates = np.bincount(answer_slots, minlength=len(answers)) / n_attempts
+    else:
+        p_values = np.full(n_questions, np.nan)
+        discrimination = np.full(n_questions, np.nan)
+        selection_rates = np.zeros(len(answers))
+
+    options = {}
+    for i, (answer_id, question_id, answer_text, is_correct) in enumerate(answers):
+        options.setdefault(question_id, []).append({
+            'id': answer_id,
+            'text': answer_text,
+            'is_correct': is_correct,
+            'rate': round(float(selection_rates[i]) * 100, 1),
+        })
+
+    report = []
+    for i, (question_id, question_text) in enumerate(questions):
+        p_value = None if np.isnan(p_values[i]) else round(float(p_values[i]), 2)
+        r_pb = None if np.isnan(discrimination[i]) else round(float(discrimination[i]), 2)
+        flags = []
+        if p_value is not None and p_value >= TOO_EASY:
+            flags.append('juda oson')
+        if p_value is not None and p_value <= TOO_HARD:
+            flags.append('juda qiyin')
+        if r_pb is not None and r_pb < LOW_DISCRIMINATION:
+            flags.append('past ajratish')
+        report.append({
+            'id': question_id,
+            'text': question_text,
+            'p_value': p_value,
+            'discrimination': r_pb,
+            'flags': flags,
+            'answers': options.get(question_id, []),
+        })
+
+    return {'attempts': n_attempts, 'excluded': excluded, 'questions': report}
+
+
+def get_analysis(test_id):
+    """Tahlil - keshdan, yangi topshiriqlar bo'lsa qayta hisoblanadi"""
+    key = _key(test_id)
+    analysis = cache.get(key)
+    if analysis is None:
+        analysis = analyze(test_id)
+        cache.set(key, analysis, ANALYSIS_TIMEOUT)
+    return analysis
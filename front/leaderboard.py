@@ -0,0 +1,224 @@
+"""Talabalar reytingi: jarayon xotirasidagi saralangan ro'yxat (umumiy va har bir daraja uchun).
+
+Tartib kaliti (-coins, -stars, id). Joy bisect bilan O(log n) topiladi, top-N esa ro'yxat boshidan olinadi.
+Coin/yulduz o'zgarishlari bazadagi jurnalga (LeaderboardEvent) yoziladi; har bir jarayon o'qishdan oldin
+jurnalning yangi yozuvlarini qo'llaydi. `rebuild()` yozuvi, katta uzilish yoki MAX_AGE o'tishi ro'yxatni
+bazadan qayta yuklaydi.
+"""
+import bisect
+import datetime
+import threading
+import time
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import CustomUser, LeaderboardEvent, UserLevel, UserType
+
+MAX_AGE = 10 * 60  # seconds; safety net for journal entries a process missed
+# Longer than MAX_AGE: every process reloads before the entries it has not read yet are pruned
+JOURNAL_RETENTION = 60 * 60
+# A process this far behind reloads from the DB instead of replaying the journal
+MAX_REPLAY = 5000
+# Ids skipped by the sequence are re-read this long: a concurrent insert may commit after a higher id
+GAP_TIMEOUT = 60
+
+LEVELS = frozenset(UserLevel.values)
+
+
+def _sort_key(user_id, coins, stars):
+    return -coins, -stars, user_id
+
+
+class Board:
+    """Bitta saralangan ro'yxat: kalitlar (-coins, -stars, id)"""
+
+    def __init__(self, keys=()):
+        self.keys = list(keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key):
+        bisect.insort(self.keys, key)
+
+    def remove(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def position(self, key):
+        """0 dan boshlanadigan o'rin (kalit ro'yxatda bo'lishi kerak)"""
+        return bisect.bisect_left(self.keys, key)
+
+    def ids(self, start, stop):
+        return [key[2] for key in self.keys[max(start, 0):stop]]
+
+
+class Leaderboard:
+    """Jarayon ichidagi reyting holati"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loaded_at = None
+        self.seq = 0
+        self.gaps = {}      # skipped event id -> time first seen missing
+        self.versions = {}  # user_id -> id of the last event applied
+        self.entries = {}   # user_id -> (coins, stars, level)
+        self.boards = {}    # None (all levels) or level -> Board
+
+    def load(self):
+        """Bazadan yuklash - indeks tartibida keladi, qayta saralash shart emas"""
+        # Events written while loading are replayed on the next read; their states are absolute, so that is safe
+        seq = LeaderboardEvent.objects.aggregate(last=Max('pk'))['last'] or 0
+        rows = CustomUser.objects.filter(user_type=UserType.STUDENT).order_by('-coins', '-stars', 'id').values_list(
+            'id', 'coins', 'stars', 'level'
+        )
+        entries, boards = {}, {None: Board()}
+        for user_id, coins, stars, level in rows.iterator(chunk_size=5000):
+            key = _sort_key(user_id, coins, stars)
+            entries[user_id] = (coins, stars, level)
+            boards[None].keys.append(key)
+            boards.setdefault(level, Board()).keys.append(key)
+        self.entries, self.boards = entries, boards
+        self.seq, self.gaps, self.versions = seq, {}, {}
+        self.loaded_at = time.monotonic()
+        LeaderboardEvent.objects.filter(
+            created_at__lt=timezone.now() - datetime.timedelta(seconds=JOURNAL_RETENTION)
+        ).delete()
+
+    def replay(self, events):
+        """Jurnal yozuvlarini id tartibida qo'llash"""
+        now = time.monotonic()
+        for event in events:
+            if event.pk in self.gaps:
+                del self.gaps[event.pk]
+            else:
+                self.gaps.update(dict.fromkeys(range(max(self.seq + 1, event.pk - MAX_REPLAY), event.pk), now))
+                self.seq = event.pk
+            # A late entry from a gap must not undo a newer one for the same user
+            if self.versions.get(event.user_id, 0) < event.pk:
+                self.versions[event.user_id] = event.pk
+                self.apply(event.user_id, event.state)
+        # Rolled back inserts leave gaps that never fill
+        self.gaps = {pk: seen for pk, seen in self.gaps.items() if now - seen < GAP_TIMEOUT}
+
+    def apply(self, user_id, state):
+        """Yozuvni qo'llash; state - (coins, stars, level) yoki None (reytingdan chiqarish)"""
+        old = self.entries.pop(user_id, None)
+        if old is not None:
+            key = _sort_key(user_id, old[0], old[1])
+            self.boards[None].remove(key)
+            self.boards[old[2]].remove(key)
+        if state is not None:
+            coins, stars, level = state
+            key = _sort_key(user_id, coins, stars)
+            self.entries[user_id] = state
+            self.boards[None].add(key)
+            self.boards.setdefault(level, Board()).add(key)
+
+    def board(self, level=None):
+        return self.boards.get(level) or Board()
+
+
+_board = Leaderboard()
+
+
+def _sync():
+    """Jurnaldagi yangi yozuvlarni qo'llash (kerak bo'lsa bazadan qayta yuklash)"""
+    with _board.lock:
+        if _board.loaded_at is None or time.monotonic() - _board.loaded_at > MAX_AGE:
+            _board.load()
+            return
+        events = list(
+            LeaderboardEvent.objects.filter(Q(pk__gt=_board.seq) | Q(pk__in=list(_board.gaps))).order_by('pk')[:MAX_REPLAY + 1]
+        )
+        if len(events) > MAX_REPLAY or any(event.user_id is None for event in events):
+            _board.load()
+            return
+        _board.replay(events)
+
+
+def _publish(changes):
+    LeaderboardEvent.objects.bulk_create([
+        LeaderboardEvent(user_id=user_id) if state is None
+        else LeaderboardEvent(user_id=user_id, coins=state[0], stars=state[1], level=state[2])
+        for user_id, state in changes
+    ])
+
+
+def refresh(user_ids):
+    """Foydalanuvchilarning joriy coin/yulduz/darajasini bazadan o'qib reytingga yozish (commit dan keyin)"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    def publish():
+        current = {
+            user_id: (coins, stars, level)
+            for user_id, coins, stars, level in CustomUser.objects.filter(
+                pk__in=user_ids, user_type=UserType.STUDENT
+            ).values_list('id', 'coins', 'stars', 'level')
+        }
+        # Users no longer found (deleted, or not students any more) leave the board
+        _publish([(user_id, current.get(user_id)) for user_id in user_ids])
+
+    # Values are read after commit, so F() updates are seen with their final values
+    transaction.on_commit(publish)
+
+
+def remove(user_id):
+    transaction.on_commit(lambda: _publish([(user_id, None)]))
+
+
+def rebuild():
+    """Barcha jarayonlar reytingni bazadan qayta yuklaydi"""
+    LeaderboardEvent.objects.create()
+    _sync()
+    return len(_board.board())
+
+
+def _level(level):
+    return level if level in LEVELS else None
+
+
+def top(limit, level=None):
+    """Eng yuqori `limit` ta talaba id lari (tartib bo'yicha)"""
+    _sync()
+    with _board.lock:
+        return _board.board(_level(level)).ids(0, limit)
+
+
+def _position(user_id, level):
+    # Caller holds the lock
+    state = _board.entries.get(user_id)
+    if state is None or level is not None and state[2] != level:
+        return None
+    return _board.board(level).position(_sort_key(user_id, state[0], state[1]))
+
+
+def rank(user_id, level=None):
+    """Talabaning o'rni (1 dan), reytingda bo'lmasa None"""
+    _sync()
+    with _board.lock:
+        position = _position(user_id, _level(level))
+    return None if position is None else position + 1
+
+
+def around(user_id, level=None, radius=2):
+    """Talaba va uning qo'shnilari: (birinchi o'rin, id lar); reytingda bo'lmasa (None, [])"""
+    _sync()
+    level = _level(level)
+    with _board.lock:
+        position = _position(user_id, level)
+        if position is None:
+            return None, []
+        start = max(position - radius, 0)
+        return start + 1, _board.board(level).ids(start, position + radius + 1)
+
+
+def size(level=None):
+    _sync()
+    with _board.lock:
+        return len(_board.board(_level(level)))
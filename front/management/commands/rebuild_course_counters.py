@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from front import counters
+from front.models import Course, Lesson
+
+
+class Command(BaseCommand):
+    help = "Kurslarning students/lessons/tests/comments va darslarning like/dislike hisoblagichlarini qayta hisoblash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', type=int, help='Faqat shu kurslar (ixtiyoriy)')
+
+    def handle(self, *args, **options):
+        queryset = Course.objects.all()
+        if options['course_ids']:
+            queryset = queryset.filter(pk__in=options['course_ids'])
+
+        updated = counters.rebuild(queryset)
+        self.stdout.write(self.style.SUCCESS(f'{updated} ta kurs hisoblagichlari yangilandi'))
+
+        lessons = Lesson.objects.all()
+        if options['course_ids']:
+            lessons = lessons.filter(course_id__in=options['course_ids'])
+        updated = counters.rebuild_lessons(lessons)
+        self.stdout.write(self.style.SUCCESS(f'{updated} ta dars reaksiyalari yangilandi'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from front import caching, facets
+
+
+class Command(BaseCommand):
+    help = "Katalog fasetlari jadvalini (kategoriya, sinf) qayta qurish"
+
+    def handle(self, *args, **options):
+        total = facets.rebuild()
+        caching.bump_version(caching.CATALOG)
+        self.stdout.write(self.style.SUCCESS(f'{total} ta faset katagi yozildi'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from front import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Talabalar reytingini bazadan qayta yuklash (barcha jarayonlarda)"
+
+    def handle(self, *args, **options):
+        total = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Reytingda {total} ta talaba"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from front import teacher_stats
+
+
+class Command(BaseCommand):
+    help = "O'qituvchi statistikasini (kurslar, talabalar, darslar, baholar) jadvallardan qayta qurish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('teacher_ids', nargs='*', type=int, help="Faqat shu o'qituvchilar (ixtiyoriy)")
+
+    def handle(self, *args, **options):
+        total = teacher_stats.rebuild(options['teacher_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f"{total} ta o'qituvchi statistikasi yozildi"))
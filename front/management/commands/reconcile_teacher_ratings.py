@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from front import ratings
+from front.models import CustomUser, UserType
+
+
+class Command(BaseCommand):
+    help = "O'qituvchilarning reyting yig'indisi, soni va o'rtachasini baholardan qayta hisoblash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('teacher_ids', nargs='*', type=int, help="Faqat shu o'qituvchilar (ixtiyoriy)")
+
+    def handle(self, *args, **options):
+        queryset = CustomUser.objects.filter(user_type=UserType.TEACHER)
+        if options['teacher_ids']:
+            queryset = queryset.filter(pk__in=options['teacher_ids'])
+
+        fixed = ratings.reconcile(queryset)
+        self.stdout.write(self.style.SUCCESS(f"{fixed} ta o'qituvchi reytingi tuzatildi"))
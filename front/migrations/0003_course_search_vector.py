@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-17 19:09
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX front_course_search_gin ON front_course USING gin (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE front_course SET search_vector = "
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(subject, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE front_course_fts USING fts5("
+            "title, subject, description, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "INSERT INTO front_course_fts (rowid, title, subject, description) "
+            "SELECT id, coalesce(title, ''), coalesce(subject, ''), coalesce(description, '') FROM front_course"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS front_course_search_gin")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS front_course_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0002_lessonprogress_teacherrating_alter_comment_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
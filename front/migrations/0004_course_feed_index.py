@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0003_course_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['type', '-created_at', '-id'], name='front_cours_type_6fb83f_idx'),
+        ),
+    ]
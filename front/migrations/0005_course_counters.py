@@ -0,0 +1,54 @@
+# Generated by Django 6.0 on 2026-10-17 19:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Course = apps.get_model('front', 'Course')
+
+    def count_of(model_name):
+        model = apps.get_model('front', model_name)
+        counts = model.objects.filter(course=OuterRef('pk')).order_by().values('course').annotate(
+            total=Count('pk')
+        ).values('total')
+        return Coalesce(Subquery(counts), 0)
+
+    Course.objects.update(
+        students_count=count_of('CourseStudent'),
+        lessons_count=count_of('Lesson'),
+        tests_count=count_of('CourseTest'),
+        comments_count=count_of('Comment'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0004_course_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lessons_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='students_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='tests_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-17 19:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_facets(apps, schema_editor):
+    Course = apps.get_model('front', 'Course')
+    CourseFacet = apps.get_model('front', 'CourseFacet')
+
+    totals = {}
+    rows = Course.objects.filter(type='open').order_by().values('category_id', 'grade').annotate(total=Count('id'))
+    for row in rows:
+        key = (row['category_id'], row['grade'] or '')
+        totals[key] = totals.get(key, 0) + row['total']
+
+    CourseFacet.objects.bulk_create([
+        CourseFacet(category_id=category_id, grade=grade, count=total)
+        for (category_id, grade), total in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0005_course_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.CharField(blank=True, default='', max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='front.coursecategory')),
+            ],
+            options={
+                'verbose_name': 'Kurs faseti',
+                'verbose_name_plural': 'Kurs fasetlari',
+                'unique_together': {('category', 'grade')},
+            },
+        ),
+        migrations.RunPython(fill_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 6.0 on 2026-10-17 19:15
+
+import re
+
+from django.db import migrations, models
+
+# Copy of front.normalize.fold as of this migration, so later changes there do not alter what it writes
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'ё': 'yo', 'ж': 'j', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p',
+    'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'x', 'ц': 'ts', 'ч': 'ch',
+    'ш': 'sh', 'щ': 'sh', 'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+}
+
+# Uzbek "е" is written "ye" at the start of a word and after a vowel
+CYRILLIC_VOWELS = set('аеёиоуэюяўы')
+
+# o‘, g‘ and the tutuq belgisi are typed with many different apostrophes (or none at all)
+APOSTROPHES_RE = re.compile("['‘’ʻʼ`´]")
+SPACES_RE = re.compile(r'\s+')
+
+
+def fold(text):
+    """Matnni qidiruv kalitiga aylantirish"""
+    if not text:
+        return ''
+    text = text.lower()
+
+    out = []
+    previous = ''
+    for char in text:
+        if char == 'е':
+            out.append('ye' if not previous.isalpha() or previous in CYRILLIC_VOWELS else 'e')
+        else:
+            out.append(CYRILLIC_TO_LATIN.get(char, char))
+        previous = char
+
+    text = APOSTROPHES_RE.sub('', ''.join(out))
+    return SPACES_RE.sub(' ', text).strip()
+
+
+def fill_search_keys(apps, schema_editor):
+    Course = apps.get_model('front', 'Course')
+    CustomUser = apps.get_model('front', 'CustomUser')
+    vendor = schema_editor.connection.vendor
+
+    courses = list(Course.objects.only('id', 'title', 'subject', 'description'))
+    for course in courses:
+        course.search_key = fold(f'{course.title} {course.subject or ""}')[:512]
+    Course.objects.bulk_update(courses, ['search_key'], batch_size=500)
+
+    users = list(CustomUser.objects.only('id', 'first_name', 'last_name', 'username'))
+    for user in users:
+        user.search_key = fold(f'{user.first_name} {user.last_name} {user.username}')[:512]
+    CustomUser.objects.bulk_update(users, ['search_key'], batch_size=500)
+
+    # Re-index the full-text documents with folded text
+    for course in courses:
+        title, subject, description = fold(course.title), fold(course.subject), fold(course.description)
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                "UPDATE front_course SET search_vector = "
+                "setweight(to_tsvector('simple', %s), 'A') || "
+                "setweight(to_tsvector('simple', %s), 'B') || "
+                "setweight(to_tsvector('simple', %s), 'C') WHERE id = %s",
+                [title, subject, description, course.id]
+            )
+        elif vendor == 'sqlite':
+            schema_editor.execute("DELETE FROM front_course_fts WHERE rowid = %s", [course.id])
+            schema_editor.execute(
+                "INSERT INTO front_course_fts (rowid, title, subject, description) VALUES (%s, %s, %s, %s)",
+                [course.id, title, subject, description]
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0006_coursefacet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=512),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='search_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=512),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 19:16
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def fill_excerpts(apps, schema_editor):
+    Course = apps.get_model('front', 'Course')
+    courses = list(Course.objects.only('id', 'description'))
+    for course in courses:
+        course.excerpt = Truncator(' '.join((course.description or '').split())).chars(200)
+    Course.objects.bulk_update(courses, ['excerpt'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0007_search_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
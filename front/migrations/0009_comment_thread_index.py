@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0008_course_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='lesson',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='comments', to='front.lesson'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['course', '-created_at', '-id'], name='front_comme_course__b625d2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['lesson', '-created_at', '-id'], name='front_comme_lesson__8baa4c_idx'),
+        ),
+    ]
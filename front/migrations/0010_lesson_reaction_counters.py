@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-17 19:24
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Lesson = apps.get_model('front', 'Lesson')
+    LessonLikeDislike = apps.get_model('front', 'LessonLikeDislike')
+
+    def count_of(is_like):
+        counts = LessonLikeDislike.objects.filter(lesson=OuterRef('pk'), is_like=is_like).order_by().values('lesson').annotate(
+            total=Count('pk')
+        ).values('total')
+        return Coalesce(Subquery(counts), 0)
+
+    Lesson.objects.update(likes_count=count_of(True), dislikes_count=count_of(False))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0009_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='dislikes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
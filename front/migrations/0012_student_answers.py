@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-17 19:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+
+def fill_stars(apps, schema_editor):
+    StudentTest = apps.get_model('front', 'StudentTest')
+    # Same thresholds submit_test used when the stars were awarded
+    StudentTest.objects.filter(completed=True, score__isnull=False).update(stars_earned=Case(
+        When(score__gte=90, then=Value(5)),
+        When(score__gte=80, then=Value(4)),
+        When(score__gte=70, then=Value(3)),
+        When(score__gte=60, then=Value(2)),
+        When(score__gte=50, then=Value(1)),
+        default=Value(0),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0011_lesson_views_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studenttest',
+            name='stars_earned',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='StudentAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='student_answers', to='front.testanswer')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_answers', to='front.testquestion')),
+                ('student_test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='front.studenttest')),
+            ],
+            options={
+                'verbose_name': 'Talaba javobi',
+                'verbose_name_plural': 'Talaba javoblari',
+                'unique_together': {('student_test', 'question')},
+            },
+        ),
+        migrations.RunPython(fill_stars, migrations.RunPython.noop),
+    ]
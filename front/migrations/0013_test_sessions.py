@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0012_student_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studenttest',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studenttest',
+            name='saved_answers',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='studenttest',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
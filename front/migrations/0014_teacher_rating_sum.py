@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-17 19:31
+
+from django.db import migrations, models
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_rating_sum(apps, schema_editor):
+    CustomUser = apps.get_model('front', 'CustomUser')
+    TeacherRating = apps.get_model('front', 'TeacherRating')
+    sums = TeacherRating.objects.filter(teacher=OuterRef('pk')).order_by().values('teacher').annotate(
+        total=Sum('rating')
+    ).values('total')
+    CustomUser.objects.update(rating_sum=Coalesce(Subquery(sums), 0, output_field=IntegerField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0013_test_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_rating_sum, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-17 19:32
+
+from django.db import migrations, models
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+
+def fill_ranking_score(apps, schema_editor):
+    CustomUser = apps.get_model('front', 'CustomUser')
+    # Prior as of this migration: mean 3.0 with the weight of 5 ratings
+    CustomUser.objects.update(ranking_score=(Cast(F('rating_sum'), FloatField()) + 5 * 3.0) / (F('total_ratings') + 5))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('front', '0014_teacher_rating_sum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='ranking_score',
+            field=models.FloatField(default=3.0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['user_type', '-ranking_score', '-id'], name='front_custo_user_ty_7f2dd2_idx'),
+        ),
+        migrations.RunPython(fill_ranking_score, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-17 19:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0015_teacher_ranking_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherStats',
+            fields=[
+                ('teacher', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('courses_count', models.PositiveIntegerField(default=0)),
+                ('open_courses_count', models.PositiveIntegerField(default=0)),
+                ('lessons_count', models.PositiveIntegerField(default=0)),
+                ('enrollments_count', models.PositiveIntegerField(default=0)),
+                ('students_count', models.PositiveIntegerField(default=0)),
+                ('ratings_1', models.PositiveIntegerField(default=0)),
+                ('ratings_2', models.PositiveIntegerField(default=0)),
+                ('ratings_3', models.PositiveIntegerField(default=0)),
+                ('ratings_4', models.PositiveIntegerField(default=0)),
+                ('ratings_5', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': "O'qituvchi statistikasi",
+                'verbose_name_plural': "O'qituvchi statistikalari",
+            },
+        ),
+        migrations.AddIndex(
+            model_name='teacherrating',
+            index=models.Index(fields=['teacher', '-created_at', '-id'], name='front_teach_teacher_735964_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('front', '0016_teacher_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['user_type', '-coins', '-stars', 'id'], name='front_custo_user_ty_ae3f14_idx'),
+        ),
+    ]
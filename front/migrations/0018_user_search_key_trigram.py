@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 10:20
+
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    # `search_key LIKE '% token%'` (a word inside the name) cannot use a B-tree index
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX front_customuser_search_trgm ON front_customuser USING gin (search_key gin_trgm_ops)"
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS front_customuser_search_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0017_leaderboard_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
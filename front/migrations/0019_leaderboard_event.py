@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('front', '0018_user_search_key_trigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.PositiveIntegerField(null=True)),
+                ('coins', models.PositiveIntegerField(null=True)),
+                ('stars', models.PositiveSmallIntegerField(null=True)),
+                ('level', models.CharField(max_length=15, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': "Reyting o'zgarishi",
+                'verbose_name_plural': "Reyting o'zgarishlari",
+            },
+        ),
+    ]
@@ -1,8 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
+from django.utils.text import Truncator
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .normalize import fold
+
 
 class UserLevel(models.TextChoices):
     BEGINNER = 'beginner', 'Beginner'
@@ -16,9 +20,30 @@ class UserType(models.TextChoices):
     TEACHER = 'teacher', 'Teacher'
 
 
-class CustomUser(AbstractUser):
+class CounterFieldsMixin:
+    """COUNTER_FIELDS dagi hisoblagichlar faqat F() bilan o'zgaradi - oddiy save() ularni eski qiymat bilan yozmaydi"""
+    COUNTER_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class CustomUser(CounterFieldsMixin, AbstractUser):
     """Foydalanuvchi model (Custom)"""
 
+    # Changed with F() by test results, regrading and front.ratings
+    COUNTER_FIELDS = ('coins', 'stars', 'rating', 'rating_sum', 'total_ratings', 'ranking_score')
+
+    # ranking_score = (PRIOR_WEIGHT * PRIOR_MEAN + rating_sum) / (PRIOR_WEIGHT + total_ratings)
+    RANKING_PRIOR_MEAN = 3.0
+    RANKING_PRIOR_WEIGHT = 5
+
     user_type = models.CharField(max_length=10, choices=UserType.choices, default=UserType.STUDENT)
     bio = models.TextField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
@@ -34,16 +59,27 @@ class CustomUser(AbstractUser):
     # Teacher-specific fields
     rating = models.FloatField(default=0.0, validators=[MinValueValidator(0.0), MaxValueValidator(5.0)])
     total_ratings = models.PositiveIntegerField(default=0)
+    # Sum of all TeacherRating values; rating = rating_sum / total_ratings (maintained by front.ratings)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    # Bayesian average used for ordering teachers: few reviews are pulled towards the prior
+    ranking_score = models.FloatField(default=RANKING_PRIOR_MEAN, editable=False)
     specialization = models.CharField(max_length=255, blank=True, null=True)
     experience_years = models.PositiveIntegerField(default=0)
 
+    # Script-folded name for search (see front.normalize)
+    search_key = models.CharField(max_length=512, blank=True, default='', editable=False, db_index=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         indexes = [
             models.Index(fields=["user_type"]),
             models.Index(fields=["level"]),
-            models.Index(fields=["rating"])
+            models.Index(fields=["rating"]),
+            # Teachers directory: WHERE user_type = 'teacher' ORDER BY ranking_score DESC, id DESC
+            models.Index(fields=["user_type", "-ranking_score", "-id"]),
+            # Students leaderboard load: WHERE user_type = 'student' ORDER BY coins DESC, stars DESC, id
+            models.Index(fields=["user_type", "-coins", "-stars", "id"]),
         ]
         verbose_name = "Foydalanuvchi"
         verbose_name_plural = "Foydalanuvchilar"
@@ -51,6 +87,19 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.get_full_name() or self.username
 
+    SEARCH_KEY_SOURCES = {'first_name', 'last_name', 'username'}
+
+    def save(self, *args, **kwargs):
+        if not self.SEARCH_KEY_SOURCES & self.get_deferred_fields():
+            self.search_key = fold(f'{self.first_name} {self.last_name} {self.username}')[:512]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.SEARCH_KEY_SOURCES & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_key'}
+        super().save(*args, **kwargs)
+
+
+EXCERPT_LENGTH = 200
+
 
 class CourseCategory(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -64,35 +113,104 @@ class CourseCategory(models.Model):
         return self.name
 
 
-class Course(models.Model):
+class Course(CounterFieldsMixin, models.Model):
     TYPE_OPEN = 'open'
     TYPE_CLOSED = 'closed'
     TYPE_CHOICES = [(TYPE_OPEN, 'Open'), (TYPE_CLOSED, 'Closed')]
 
+    COUNTER_FIELDS = ('students_count', 'lessons_count', 'tests_count', 'comments_count')
+    SEARCH_KEY_SOURCES = {'title', 'subject'}
+
+    # Large columns that listing pages never display
+    LIST_DEFERRED = ('description', 'search_vector')
+
     background_image = models.ImageField(upload_to='course_backgrounds/', blank=True, null=True)
     title = models.CharField(max_length=255)
     subject = models.CharField(max_length=255, null=True, blank=True)
     grade = models.CharField(max_length=50, null=True, blank=True)
     description = models.TextField(blank=True)
+    # Short teaser for listing pages, generated from description on save
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, default='', editable=False)
     type = models.CharField(max_length=10, choices=TYPE_CHOICES, default=TYPE_OPEN)
 
     category = models.ForeignKey(CourseCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='courses')
     teacher = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='courses')
 
+    # Script-folded title and subject (see front.normalize)
+    search_key = models.CharField(max_length=512, blank=True, default='', editable=False, db_index=True)
+
+    # Full-text search document, maintained by front.search (GIN index is created in the migration)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    # Denormalized counters, maintained by front.signals (rebuild: manage.py rebuild_course_counters)
+    students_count = models.PositiveIntegerField(default=0, editable=False)
+    lessons_count = models.PositiveIntegerField(default=0, editable=False)
+    tests_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
-        indexes = [models.Index(fields=['teacher']), models.Index(fields=['type'])]
+        indexes = [
+            models.Index(fields=['teacher']),
+            models.Index(fields=['type']),
+            # Catalog feed: WHERE type = ... ORDER BY created_at DESC, id DESC
+            models.Index(fields=['type', '-created_at', '-id']),
+        ]
         verbose_name = "Kurs"
         verbose_name_plural = "Kurslar"
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded facet values, so front.facets can move the course between buckets on save
+        loaded = dict(zip(field_names, values))
+        if {'type', 'category_id', 'grade'} <= loaded.keys():
+            instance._loaded_facet = (loaded['type'], loaded['category_id'], loaded['grade'])
+        # ...and the owner and type, so front.teacher_stats can move it between teachers
+        if {'teacher_id', 'type'} <= loaded.keys():
+            instance._loaded_owner = (loaded['teacher_id'], loaded['type'])
+        return instance
+
+    def save(self, *args, **kwargs):
+        deferred = self.get_deferred_fields()
+        if not self.SEARCH_KEY_SOURCES & deferred:
+            self.search_key = fold(f'{self.title} {self.subject or ""}')[:512]
+        if 'description' not in deferred:
+            self.excerpt = Truncator(' '.join((self.description or '').split())).chars(EXCERPT_LENGTH)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if self.SEARCH_KEY_SOURCES & update_fields:
+                update_fields.add('search_key')
+            if 'description' in update_fields:
+                update_fields.add('excerpt')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+
+class CourseFacet(models.Model):
+    """Ochiq kurslar soni (kategoriya, sinf) bo'yicha - katalog filtrlari uchun"""
+    category = models.ForeignKey(CourseCategory, on_delete=models.CASCADE, null=True, blank=True, related_name='facets')
+    grade = models.CharField(max_length=50, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (('category', 'grade'),)
+        verbose_name = "Kurs faseti"
+        verbose_name_plural = "Kurs fasetlari"
+
+    def __str__(self):
+        return f"{self.category_id or '-'} / {self.grade or '-'}: {self.count}"
+
 
-class Lesson(models.Model):
+class Lesson(CounterFieldsMixin, models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lessons')
     order = models.PositiveIntegerField(default=0, help_text='Order of lesson inside the course')
     title = models.CharField(max_length=255)
@@ -100,6 +218,14 @@ class Lesson(models.Model):
     video_url = models.URLField(blank=True, null=True)
     presentation_file = models.FileField(upload_to='lesson_presentations/', blank=True, null=True)
 
+    COUNTER_FIELDS = ('likes_count', 'dislikes_count', 'views_count')
+
+    # Denormalized reaction counters, maintained by front.reactions (rebuild: manage.py rebuild_course_counters)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    dislikes_count = models.PositiveIntegerField(default=0, editable=False)
+    # Flushed from front.events in batches
+    views_count = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -134,11 +260,17 @@ class LessonProgress(models.Model):
 class Comment(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='comments')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='comments')
+    lesson = models.ForeignKey(Lesson, on_delete=models.SET_NULL, null=True, blank=True, related_name='comments')
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Comment threads are paged newest-first by (created_at, id) keyset
+            models.Index(fields=['course', '-created_at', '-id']),
+            models.Index(fields=['lesson', '-created_at', '-id']),
+        ]
         verbose_name = "Izoh"
         verbose_name_plural = "Izohlar"
 
@@ -240,9 +372,16 @@ class StudentTest(models.Model):
     course_test = models.ForeignKey(CourseTest, on_delete=models.CASCADE, related_name='student_tests')
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='student_tests')
     score = models.FloatField(blank=True, null=True)
+    # Stars awarded for this score, so a re-grade can adjust CustomUser.stars by the difference
+    stars_earned = models.PositiveSmallIntegerField(default=0)
     completed = models.BooleanField(default=False)
     taken_at = models.DateTimeField(auto_now_add=True)
 
+    # Current session (front.test_sessions): deadline from time_limit_minutes, autosaved {question_id: answer_id}
+    started_at = models.DateTimeField(blank=True, null=True)
+    deadline = models.DateTimeField(blank=True, null=True)
+    saved_answers = models.JSONField(default=dict, blank=True)
+
     class Meta:
         unique_together = (('course_test', 'user'),)
         ordering = ['-taken_at']
@@ -255,6 +394,21 @@ class StudentTest(models.Model):
         return f"{self.user.username} — {self.course_test.title} — Jarayonda"
 
 
+class StudentAnswer(models.Model):
+    """Talabaning test savoliga tanlagan javobi (qayta baholash uchun)"""
+    student_test = models.ForeignKey(StudentTest, on_delete=models.CASCADE, related_name='answers')
+    question = models.ForeignKey(TestQuestion, on_delete=models.CASCADE, related_name='student_answers')
+    answer = models.ForeignKey(TestAnswer, on_delete=models.SET_NULL, null=True, blank=True, related_name='student_answers')
+
+    class Meta:
+        unique_together = (('student_test', 'question'),)
+        verbose_name = "Talaba javobi"
+        verbose_name_plural = "Talaba javoblari"
+
+    def __str__(self):
+        return f"{self.student_test_id} — {self.question_id}: {self.answer_id}"
+
+
 class News(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
@@ -361,8 +515,80 @@ class TeacherRating(models.Model):
     class Meta:
         unique_together = ('user', 'teacher')
         ordering = ['-created_at']
+        indexes = [
+            # Teacher profile reviews: WHERE teacher_id = ... ORDER BY created_at DESC, id DESC
+            models.Index(fields=['teacher', '-created_at', '-id']),
+        ]
         verbose_name = "O'qituvchi baholash"
         verbose_name_plural = "O'qituvchi baholashlar"
 
     def __str__(self):
-        return f"{self.user.username} → {self.teacher.username}: {self.rating}⭐"
\ No newline at end of file
+        return f"{self.user.username} → {self.teacher.username}: {self.rating}⭐"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded value, so front.teacher_stats can move the rating between histogram buckets
+        if 'rating' in field_names:
+            instance._loaded_rating = values[field_names.index('rating')]
+        return instance
+
+
+class TeacherStats(models.Model):
+    """O'qituvchi statistikasi - kurs, dars, yozilish va baho o'zgarganda F() bilan yangilanadi"""
+    RATING_FIELDS = ('ratings_1', 'ratings_2', 'ratings_3', 'ratings_4', 'ratings_5')
+
+    teacher = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    courses_count = models.PositiveIntegerField(default=0)
+    open_courses_count = models.PositiveIntegerField(default=0)
+    lessons_count = models.PositiveIntegerField(default=0)
+    enrollments_count = models.PositiveIntegerField(default=0)
+    # Distinct students across all of the teacher's courses
+    students_count = models.PositiveIntegerField(default=0)
+    ratings_1 = models.PositiveIntegerField(default=0)
+    ratings_2 = models.PositiveIntegerField(default=0)
+    ratings_3 = models.PositiveIntegerField(default=0)
+    ratings_4 = models.PositiveIntegerField(default=0)
+    ratings_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "O'qituvchi statistikasi"
+        verbose_name_plural = "O'qituvchi statistikalari"
+
+    def __str__(self):
+        return f"{self.teacher_id}: {self.courses_count} kurs, {self.students_count} talaba"
+
+    @property
+    def ratings_count(self):
+        return sum(getattr(self, field) for field in self.RATING_FIELDS)
+
+    def histogram(self):
+        """[(baho, soni, foiz)] - 5 dan 1 gacha"""
+        total = self.ratings_count
+        rows = []
+        for value in range(5, 0, -1):
+            count = getattr(self, f'ratings_{value}')
+            rows.append((value, count, round(count * 100 / total) if total else 0))
+        return rows
+
+
+class LeaderboardEvent(models.Model):
+    """Reyting jurnali: talabaning yangi coin/yulduz/darajasi - barcha jarayonlar id tartibida qo'llaydi"""
+    # None: every process reloads the board from the users table (front.leaderboard.rebuild)
+    user_id = models.PositiveIntegerField(null=True)
+    # None: the user leaves the board (deleted, or no longer a student)
+    coins = models.PositiveIntegerField(null=True)
+    stars = models.PositiveSmallIntegerField(null=True)
+    level = models.CharField(max_length=15, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Reyting o'zgarishi"
+        verbose_name_plural = "Reyting o'zgarishlari"
+
+    def __str__(self):
+        return f"{self.pk}: {self.user_id} → {self.coins}"
+
+    @property
+    def state(self):
+        return None if self.coins is None else (self.coins, self.stars, self.level)
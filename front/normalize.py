@@ -0,0 +1,39 @@
+"""Qidiruv uchun matnni normallashtirish: kichik harf, kirill -> lotin, tutuq belgilarisiz.
+
+"Ўзбек тили", "O‘zbek tili" va "ozbek tili" bir xil kalitga aylanadi: "ozbek tili".
+"""
+import re
+
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'ё': 'yo', 'ж': 'j', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p',
+    'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'x', 'ц': 'ts', 'ч': 'ch',
+    'ш': 'sh', 'щ': 'sh', 'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+}
+
+# Uzbek "е" is written "ye" at the start of a word and after a vowel
+CYRILLIC_VOWELS = set('аеёиоуэюяўы')
+
+# o‘, g‘ and the tutuq belgisi are typed with many different apostrophes (or none at all)
+APOSTROPHES_RE = re.compile("['‘’ʻʼ`´]")
+SPACES_RE = re.compile(r'\s+')
+
+
+def fold(text):
+    """Matnni qidiruv kalitiga aylantirish"""
+    if not text:
+        return ''
+    text = text.lower()
+
+    out = []
+    previous = ''
+    for char in text:
+        if char == 'е':
+            out.append('ye' if not previous.isalpha() or previous in CYRILLIC_VOWELS else 'e')
+        else:
+            out.append(CYRILLIC_TO_LATIN.get(char, char))
+        previous = char
+
+    text = APOSTROPHES_RE.sub('', ''.join(out))
+    return SPACES_RE.sub(' ', text).strip()
@@ -0,0 +1,52 @@
+"""Kurs darslari mundarijasi (id, nom, tartib, o'rin) - keshda, lesson_detail navigatsiyasi uchun"""
+from django.core.cache import cache
+
+from . import caching
+from .models import Lesson
+
+OUTLINE_TIMEOUT = 24 * 60 * 60
+
+
+class Outline:
+    """Kurs darslari ro'yxati va id -> o'rin xaritasi"""
+
+    def __init__(self, lessons):
+        self.lessons = lessons
+        self.positions = {item['id']: index for index, item in enumerate(lessons)}
+
+    def __len__(self):
+        return len(self.lessons)
+
+    def position(self, lesson_id):
+        """0 dan boshlanadigan o'rin (topilmasa None)"""
+        return self.positions.get(lesson_id)
+
+    def previous(self, lesson_id):
+        index = self.positions.get(lesson_id)
+        return self.lessons[index - 1] if index else None
+
+    def next(self, lesson_id):
+        index = self.positions.get(lesson_id)
+        if index is None or index + 1 >= len(self.lessons):
+            return None
+        return self.lessons[index + 1]
+
+
+def get_outline(course_id, lesson_id=None):
+    """Kurs mundarijasi - keshdan, bo'lmasa bitta yengil so'rov bilan"""
+    key = f'outline:{course_id}:{caching.get_version("outline", course_id)}'
+    lessons = cache.get(key)
+    # A lesson missing from the cached outline means it was added before the version bump landed
+    if lessons is None or (lesson_id is not None and all(item['id'] != lesson_id for item in lessons)):
+        rows = Lesson.objects.filter(course_id=course_id).order_by('order', 'id').values_list('id', 'title', 'order')
+        lessons = [
+            {'id': lesson_id, 'title': title, 'order': order, 'position': index + 1}
+            for index, (lesson_id, title, order) in enumerate(rows)
+        ]
+        cache.set(key, lessons, OUTLINE_TIMEOUT)
+    return Outline(lessons)
+
+
+def invalidate(course_id):
+    """Dars qo'shilganda, tahrirlanganda, o'chirilganda yoki tartibi o'zgarganda"""
+    caching.bump_version('outline', course_id)
@@ -0,0 +1,65 @@
+"""Keyset (cursor) pagination - OFFSET va COUNT(*) so'rovlarisiz"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    """Kalit qiymatlarini shaffof bo'lmagan cursor satriga aylantirish"""
+    payload = [v.isoformat() if isinstance(v, (datetime.datetime, datetime.date)) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Cursor satrini qiymatlar ro'yxatiga qaytarish (noto'g'ri bo'lsa None)"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def _after(keys, values):
+    """(k1, k2, ...) > (v1, v2, ...) shartini tartib yo'nalishiga qarab qurish"""
+    condition = Q()
+    for i, key in enumerate(keys):
+        name = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_key, prev_value in zip(keys[:i], values[:i]):
+            step &= Q(**{prev_key.lstrip('-'): prev_value})
+        condition |= step
+    return condition
+
+
+def keyset_page(queryset, keys, cursor=None, per_page=20):
+    """Keyingi sahifa va uning cursorini qaytarish: (items, next_cursor)"""
+    queryset = queryset.order_by(*keys)
+
+    values = decode_cursor(cursor, len(keys))
+    if values is not None:
+        try:
+            queryset = queryset.filter(_after(keys, values))
+        except (TypeError, ValueError, ValidationError):
+            # Well-formed cursor with values of the wrong type: start from the first page
+            pass
+
+    # One extra row tells us whether another page exists
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, key.lstrip('-')) for key in keys])
+
+    return items, next_cursor
@@ -0,0 +1,73 @@
+"""O'qituvchi reytingi: yig'indi va son F() bilan o'zgaradi, o'rtacha va Bayes bali shu UPDATE ichida hisoblanadi"""
+from django.db import transaction
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+from .models import CustomUser, TeacherRating, UserType
+
+
+def _average(rating_sum, total):
+    """round(sum / count, 1), 0 bo'lsa 0"""
+    return Coalesce(Round(Cast(rating_sum, FloatField()) / NullIf(total, 0), 1), Value(0.0))
+
+
+def _ranking_score(rating_sum, total):
+    """Bayes o'rtachasi: kam baholi o'qituvchi oldindan berilgan o'rtachaga yaqin turadi"""
+    weight = CustomUser.RANKING_PRIOR_WEIGHT
+    return (Cast(rating_sum, FloatField()) + weight * CustomUser.RANKING_PRIOR_MEAN) / (total + weight)
+
+
+def _apply(teacher_id, sum_delta, count_delta):
+    # Every expression in one UPDATE sees the row's old values, so the average uses the deltas too
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('total_ratings') + count_delta
+    CustomUser.objects.filter(pk=teacher_id).update(
+        rating_sum=new_sum,
+        total_ratings=new_count,
+        rating=_average(new_sum, new_count),
+        ranking_score=_ranking_score(new_sum, new_count),
+    )
+
+
+def rate(user, teacher, value, review=''):
+    """Baho qo'yish yoki o'zgartirish - o'qituvchining barcha baholarini qayta o'qimasdan"""
+    with transaction.atomic():
+        existing = TeacherRating.objects.select_for_update().filter(user=user, teacher=teacher).first()
+        if existing is None:
+            rating = TeacherRating.objects.create(user=user, teacher=teacher, rating=value, review=review)
+            _apply(teacher.pk, value, 1)
+        else:
+            delta = value - existing.rating
+            existing.rating = value
+            existing.review = review
+            existing.save(update_fields=['rating', 'review', 'updated_at'])
+            rating = existing
+            if delta:
+                _apply(teacher.pk, delta, 0)
+    return rating
+
+
+def reconcile(queryset=None):
+    """Yig'indi, son, o'rtacha va reyting ballini TeacherRating jadvalidan qayta hisoblash; tuzatilgan o'qituvchilar soni"""
+    if queryset is None:
+        queryset = CustomUser.objects.filter(user_type=UserType.TEACHER)
+
+    ratings = TeacherRating.objects.filter(teacher=OuterRef('pk')).order_by().values('teacher')
+    rating_sum = Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0, output_field=IntegerField())
+    total = Coalesce(Subquery(ratings.annotate(total=Count('pk')).values('total')), 0, output_field=IntegerField())
+
+    # ranking_score is compared too, so changing the prior and reconciling re-scores everyone
+    drifted = queryset.annotate(
+        actual_sum=rating_sum, actual_total=total, actual_score=_ranking_score(rating_sum, total)
+    ).exclude(
+        rating_sum=F('actual_sum'), total_ratings=F('actual_total'), ranking_score=F('actual_score')
+    ).values_list('pk', flat=True)
+    drifted = list(drifted)
+    if drifted:
+        CustomUser.objects.filter(pk__in=drifted).update(
+            rating_sum=rating_sum,
+            total_ratings=total,
+            rating=_average(rating_sum, total),
+            ranking_score=_ranking_score(rating_sum, total),
+        )
+    return len(drifted)
@@ -0,0 +1,85 @@
+"""Darslarga like/dislike - Lesson.likes_count/dislikes_count bilan bitta tranzaksiyada"""
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from . import counters
+from .models import Lesson, LessonLikeDislike
+
+LIKE = 'like'
+DISLIKE = 'dislike'
+
+
+def reaction_name(is_like):
+    if is_like is None:
+        return None
+    return LIKE if is_like else DISLIKE
+
+
+def toggled(current, is_like):
+    """Tugma bosilgandan keyingi holat: yo'q -> qo'yish, bir xil -> olib tashlash, teskari -> o'zgartirish"""
+    return None if current == is_like else is_like
+
+
+def with_user_reaction(queryset, user):
+    """Darslarga foydalanuvchi reaksiyasini qo'shish (`user_is_like`: True/False/None) - qo'shimcha so'rovsiz"""
+    reaction = LessonLikeDislike.objects.filter(lesson=OuterRef('pk'), user=user).values('is_like')[:1]
+    return queryset.annotate(user_is_like=Subquery(reaction))
+
+
+def _pairs_filter(pairs):
+    condition = Q()
+    for user_id, lesson_id in pairs:
+        condition |= Q(user_id=user_id, lesson_id=lesson_id)
+    return condition
+
+
+def current_reactions(pairs):
+    """Bazadagi reaksiyalar: {(user_id, lesson_id): is_like}"""
+    if not pairs:
+        return {}
+    rows = LessonLikeDislike.objects.filter(_pairs_filter(pairs)).values_list('user_id', 'lesson_id', 'is_like')
+    return {(user_id, lesson_id): is_like for user_id, lesson_id, is_like in rows}
+
+
+def apply(states):
+    """Yakuniy holatlarni bazaga yozish: {(user_id, lesson_id): True/False/None}
+
+    Qatorlar bulk_create/bulk_update/delete bilan yoziladi, o'zgargan darslarning hisoblagichlari shu
+    tranzaksiyada jadvaldan qayta hisoblanadi.
+    """
+    if not states:
+        return 0
+
+    with transaction.atomic():
+        rows = {
+            (reaction.user_id, reaction.lesson_id): reaction
+            for reaction in LessonLikeDislike.objects.select_for_update().filter(_pairs_filter(states))
+        }
+
+        to_create, to_update, to_delete = [], [], []
+        lesson_ids = set()
+        for (user_id, lesson_id), is_like in states.items():
+            row = rows.get((user_id, lesson_id))
+            before = row.is_like if row else None
+            if before == is_like:
+                continue
+            lesson_ids.add(lesson_id)
+
+            if row is None:
+                to_create.append(LessonLikeDislike(user_id=user_id, lesson_id=lesson_id, is_like=is_like))
+            elif is_like is None:
+                to_delete.append(row.pk)
+            else:
+                row.is_like = is_like
+                to_update.append(row)
+
+        LessonLikeDislike.objects.bulk_create(to_create, ignore_conflicts=True)
+        LessonLikeDislike.objects.bulk_update(to_update, ['is_like'])
+        LessonLikeDislike.objects.filter(pk__in=to_delete).delete()
+
+        # Counted from the rows rather than from deltas: a row another process inserted first is skipped above
+        if lesson_ids:
+            counters.rebuild_lessons(Lesson.objects.filter(pk__in=lesson_ids))
+
+    return len(to_create) + len(to_update) + len(to_delete)
+
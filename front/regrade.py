@@ -0,0 +1,74 @@
+"""Test tahrirlanganda barcha topshiriqlarni qayta baholash - NumPy bilan bitta vektor hisobda"""
+import numpy as np
+from django.db import transaction
+
+from . import grading, leaderboard
+from .counters import clamped
+from .models import CustomUser, StudentAnswer, StudentTest
+
+
+def regrade_test(test_id):
+    """Saqlangan javoblar bo'yicha ball va yulduzlarni qayta hisoblash: (o'zgargan, qayta baholanmagan) sonlari.
+
+    Javob yozuvi bo'lmagan topshiriq hech narsa belgilamagan bo'lsa 0 ball bilan to'g'ri qoladi; ball olgan bo'lsa
+    javoblari saqlanmagan (eski) topshiriq - u o'zgartirilmaydi va ikkinchi sonda hisoblanadi.
+    """
+    # Nothing answered scores 0 under any key; a positive score without responses predates stored answers
+    skipped = StudentTest.objects.filter(
+        course_test_id=test_id, completed=True, score__gt=0, answers__isnull=True
+    ).count()
+
+    answer_key = grading.build_answer_key(test_id)
+    correct_ids = np.fromiter(
+        (answer_id for _, correct in answer_key.values() for answer_id in correct), dtype=np.int64
+    )
+
+    rows = StudentAnswer.objects.filter(
+        student_test__course_test_id=test_id, student_test__completed=True
+    ).values_list('student_test_id', 'answer_id')
+    responses = np.array([(student_test_id, answer_id or 0) for student_test_id, answer_id in rows], dtype=np.int64)
+    if not len(responses):
+        return 0, skipped
+
+    # One slot per attempt; each response adds 1 to its attempt if the answer is correct
+    attempt_ids, slots = np.unique(responses[:, 0], return_inverse=True)
+    correct = np.bincount(slots, weights=np.isin(responses[:, 1], correct_ids), minlength=len(attempt_ids))
+
+    total_questions = len(answer_key)
+    scores = correct / total_questions * 100 if total_questions else np.zeros(len(attempt_ids))
+    stars = np.searchsorted(grading.STAR_THRESHOLDS, scores, side='right')
+
+    with transaction.atomic():
+        current = {
+            attempt_id: (user_id, score, stars_earned)
+            for attempt_id, user_id, score, stars_earned in StudentTest.objects.select_for_update().filter(
+                id__in=attempt_ids.tolist()
+            ).values_list('id', 'user_id', 'score', 'stars_earned')
+        }
+        # Attempts deleted since the responses were read are dropped
+        present = np.array([attempt_id in current for attempt_id in attempt_ids.tolist()], dtype=bool)
+        attempt_ids, scores, stars = attempt_ids[present], scores[present], stars[present]
+        old = [current[attempt_id] for attempt_id in attempt_ids.tolist()]
+        user_ids = np.array([row[0] for row in old], dtype=np.int64)
+        old_scores = np.array([np.nan if row[1] is None else row[1] for row in old], dtype=np.float64)
+        old_stars = np.array([row[2] for row in old], dtype=np.int64)
+
+        changed = (old_scores != scores) | (old_stars != stars)
+        StudentTest.objects.bulk_update([
+            StudentTest(pk=attempt_id, score=score, stars_earned=earned)
+            for attempt_id, score, earned in zip(
+                attempt_ids[changed].tolist(), scores[changed].tolist(), stars[changed].tolist()
+            )
+        ], ['score', 'stars_earned'])
+
+        # Users keep the stars of their other tests; only the difference is applied
+        delta_users, user_slots = np.unique(user_ids, return_inverse=True)
+        deltas = np.bincount(user_slots, weights=stars - old_stars, minlength=len(delta_users)).astype(np.int64)
+        changed_users = [
+            CustomUser(pk=user_id, stars=clamped('stars', delta))
+            for user_id, delta in zip(delta_users.tolist(), deltas.tolist()) if delta
+        ]
+        CustomUser.objects.bulk_update(changed_users, ['stars'])
+        leaderboard.refresh(user.pk for user in changed_users)
+
+    return int(changed.sum()), skipped
@@ -0,0 +1,96 @@
+"""Kurslar bo'yicha to'liq matnli qidiruv (PostgreSQL tsvector / SQLite FTS5)"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+from django.db.models.expressions import RawSQL
+
+from .models import Course
+from .normalize import fold
+
+# Uzbek has no PostgreSQL dictionary, so the 'simple' config (lowercase, no stemming) is used
+SEARCH_CONFIG = 'simple'
+FTS_TABLE = 'front_course_fts'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Qidiruv so'zini normallashtirib tokenlarga ajratish"""
+    return TOKEN_RE.findall(fold(query))
+
+
+def _documents(course):
+    # Index script-folded text, so Latin and Cyrillic spellings meet in the same lexemes
+    return fold(course.title), fold(course.subject), fold(course.description)
+
+
+def _search_vector(course):
+    title, subject, description = _documents(course)
+    return (
+        SearchVector(Value(title), weight='A', config=SEARCH_CONFIG) +
+        SearchVector(Value(subject), weight='B', config=SEARCH_CONFIG) +
+        SearchVector(Value(description), weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def index_course(course):
+    """Kursning qidiruv indeksini yangilash"""
+    if connection.vendor == 'postgresql':
+        Course.objects.filter(pk=course.pk).update(search_vector=_search_vector(course))
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [course.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, subject, description) VALUES (%s, %s, %s, %s)',
+                [course.pk, *_documents(course)]
+            )
+
+
+def unindex_course(course_id):
+    """Kursni qidiruv indeksidan o'chirish"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [course_id])
+
+
+def search_courses(queryset, query):
+    """Kurslarni qidirish - natija `search_rank` bo'yicha tartiblanadi"""
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        # Prefix match on every token, so partially typed words still hit the index
+        ts_query = SearchQuery(' & '.join(f'{token}:*' for token in tokens), config=SEARCH_CONFIG, search_type='raw')
+        # ts_rank is float4: as double precision it survives the keyset cursor (a JSON double) unchanged
+        return queryset.filter(search_vector=ts_query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), ts_query), FloatField())
+        ).order_by('-search_rank', '-created_at', '-id')
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 5.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {Course._meta.db_table}.id',
+            [match]
+        )
+        return queryset.annotate(search_rank=rank).filter(
+            search_rank__isnull=False
+        ).order_by('-search_rank', '-created_at', '-id')
+
+    # Other backends: plain substring match
+    condition = Q()
+    for token in tokens:
+        condition &= Q(search_key__contains=token) | Q(description__icontains=token)
+    return queryset.filter(condition)
+
+
+def filter_by_key(queryset, query):
+    """`search_key` bo'yicha so'z boshidan qidirish (har bir token uchun)"""
+    # The first word is served by the B-tree index, later words by the pg_trgm GIN index (migration 0018)
+    for token in tokenize(query):
+        queryset = queryset.filter(Q(search_key__startswith=token) | Q(search_key__contains=f' {token}'))
+    return queryset
@@ -0,0 +1,237 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import caching, completion, counters, course_context, directory, facets, leaderboard, outline, search, suggest, teacher_stats
+from .models import Course, CourseCategory, CourseStudent, CustomUser, Lesson, TeacherRating, UserType
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, update_fields=None, **kwargs):
+    """Kurs saqlanganda qidiruv indeksini yangilash"""
+    if update_fields and not {'title', 'subject', 'description'} & set(update_fields):
+        return
+    search.index_course(instance)
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    """Kurs o'chirilganda indeksdan olib tashlash"""
+    search.unindex_course(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+def course_facets_saved(sender, instance, created, **kwargs):
+    """Kurs turi, kategoriyasi yoki sinfi o'zgarganda fasetlarni yangilash"""
+    new_key = facets.course_facet_key(instance)
+    loaded = getattr(instance, '_loaded_facet', None)
+    if created:
+        facets.adjust(new_key, 1)
+    elif loaded is None:
+        # Previous bucket unknown (instance not loaded from the DB)
+        facets.rebuild()
+    else:
+        old_key = facets.facet_key(*loaded)
+        if old_key != new_key:
+            facets.adjust(old_key, -1)
+            facets.adjust(new_key, 1)
+    instance._loaded_facet = (instance.type, instance.category_id, instance.grade)
+
+
+@receiver(post_delete, sender=Course)
+def course_facets_deleted(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_facet', None)
+    facets.adjust(facets.facet_key(*loaded) if loaded else facets.course_facet_key(instance), -1)
+
+
+@receiver(post_delete, sender=CourseCategory)
+def category_deleted(sender, instance, **kwargs):
+    """Kategoriya o'chirilsa kurslari kategoriyasiz qoladi (signalsiz) - qayta qurish"""
+    facets.rebuild()
+    caching.bump_version(caching.CATALOG)
+
+
+def _counter_receivers(field):
+    def row_created(sender, instance, created, **kwargs):
+        if created:
+            counters.increment(instance.course_id, field, 1)
+
+    def row_deleted(sender, instance, **kwargs):
+        counters.increment(instance.course_id, field, -1)
+
+    return row_created, row_deleted
+
+
+# Keep Course.<x>_count in sync with enrollments, lessons, tests and comments
+for _field, _model in counters.COUNTERS.items():
+    _created, _deleted = _counter_receivers(_field)
+    post_save.connect(_created, sender=_model, weak=False, dispatch_uid=f'counter_created_{_field}')
+    post_delete.connect(_deleted, sender=_model, weak=False, dispatch_uid=f'counter_deleted_{_field}')
+
+
+# Versioned cache: connected after the counters so a bump never precedes the count update
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, **kwargs):
+    """Kurs o'zgarganda kartochka va katalog versiyasini oshirish"""
+    caching.bump_version('course', instance.pk)
+    caching.bump_version(caching.CATALOG)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=CourseStudent)
+@receiver(post_delete, sender=CourseStudent)
+def course_content_changed(sender, instance, **kwargs):
+    """Dars yoki yozilish o'zgarganda kurs kartochkasi versiyasini oshirish"""
+    caching.bump_version('course', instance.course_id)
+    teacher_id = _course_teacher_id(sender, instance)
+    if teacher_id:
+        caching.bump_version('teacher', teacher_id)
+
+
+def _course_teacher_id(sender, instance):
+    if sender.course.is_cached(instance):
+        return instance.course.teacher_id
+    return Course.objects.filter(pk=instance.course_id).values_list('teacher_id', flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=TeacherRating)
+@receiver(post_delete, sender=TeacherRating)
+def teacher_page_changed(sender, instance, **kwargs):
+    """O'qituvchi sahifasi versiyasini oshirish (kurslar, baholar)"""
+    caching.bump_version('teacher', instance.teacher_id)
+
+
+@receiver(post_save, sender=CustomUser)
+def teacher_profile_changed(sender, instance, update_fields=None, **kwargs):
+    """O'qituvchi profili o'zgarsa - uning sahifasi va kurs kartochkalari eskiradi"""
+    if instance.user_type != UserType.TEACHER or update_fields and set(update_fields) <= {'last_login'}:
+        return
+    caching.bump_version('teacher', instance.pk)
+    # Cards and course pages show the teacher's name
+    for course_id in Course.objects.filter(teacher=instance).values_list('id', flat=True):
+        caching.bump_version('course', course_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=TeacherRating)
+@receiver(post_delete, sender=TeacherRating)
+def directory_changed(sender, instance, **kwargs):
+    """O'qituvchilar katalogi statistikasi eskiradi"""
+    directory.invalidate()
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def directory_teacher_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    if instance.user_type == UserType.TEACHER:
+        directory.invalidate()
+    elif not created and (update_fields is None or 'user_type' in update_fields):
+        # The user may have just stopped being a teacher
+        directory.invalidate()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def suggest_course_changed(sender, instance, **kwargs):
+    """Takliflar indeksini eskirgan deb belgilash"""
+    caching.bump_version(suggest.SUGGEST)
+
+
+@receiver(post_save, sender=CustomUser)
+def suggest_teacher_changed(sender, instance, update_fields=None, **kwargs):
+    if instance.user_type != UserType.TEACHER:
+        return
+    if update_fields and not {'first_name', 'last_name', 'username', 'user_type'} & set(update_fields):
+        return
+    caching.bump_version(suggest.SUGGEST)
+
+
+@receiver(post_save, sender=CourseStudent)
+def enrollment_created(sender, instance, created, **kwargs):
+    """Yozilish holati keshini yangilash"""
+    if created:
+        transaction.on_commit(lambda: course_context.set_enrollment(instance.user_id, instance.course_id, True))
+
+
+@receiver(post_delete, sender=CourseStudent)
+def enrollment_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: course_context.forget_enrollment(instance.user_id, instance.course_id))
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_outline_changed(sender, instance, **kwargs):
+    """Dars qo'shildi, tahrirlandi, o'chirildi yoki tartibi o'zgardi - mundarija eskiradi"""
+    outline.invalidate(instance.course_id)
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_completion_changed(sender, instance, **kwargs):
+    """O'chirilgan dars yakunlanganlar to'plamlarida qolmasligi kerak"""
+    completion.invalidate_course(instance.course_id)
+
+
+# ---- TeacherStats ----
+
+@receiver(post_save, sender=Course)
+def stats_course_saved(sender, instance, created, **kwargs):
+    teacher_stats.course_saved(instance, created)
+
+
+@receiver(post_delete, sender=Course)
+def stats_course_deleted(sender, instance, **kwargs):
+    teacher_stats.course_deleted(instance)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def stats_lesson_changed(sender, instance, created=False, **kwargs):
+    if kwargs['signal'] is post_save and not created:
+        return
+    teacher_stats.lesson_changed(_course_teacher_id(sender, instance), 1 if created else -1)
+
+
+@receiver(post_save, sender=CourseStudent)
+@receiver(post_delete, sender=CourseStudent)
+def stats_enrollment_changed(sender, instance, created=False, **kwargs):
+    if kwargs['signal'] is post_save and not created:
+        return
+    teacher_stats.enrollment_changed(instance, _course_teacher_id(sender, instance), 1 if created else -1)
+
+
+@receiver(post_save, sender=TeacherRating)
+def stats_rating_saved(sender, instance, created, **kwargs):
+    teacher_stats.rating_saved(instance, created)
+
+
+@receiver(post_delete, sender=TeacherRating)
+def stats_rating_deleted(sender, instance, **kwargs):
+    teacher_stats.rating_deleted(instance)
+
+
+# ---- Students leaderboard ----
+
+LEADERBOARD_FIELDS = {'coins', 'stars', 'level', 'user_type'}
+
+
+@receiver(post_save, sender=CustomUser)
+def leaderboard_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Coin, yulduz, daraja yoki foydalanuvchi turi o'zgarsa reytingni yangilash"""
+    if update_fields is not None and not LEADERBOARD_FIELDS & set(update_fields):
+        return
+    if created and instance.user_type != UserType.STUDENT:
+        return
+    leaderboard.refresh([instance.pk])
+
+
+@receiver(post_delete, sender=CustomUser)
+def leaderboard_user_deleted(sender, instance, **kwargs):
+    if instance.user_type == UserType.STUDENT:
+        leaderboard.remove(instance.pk)
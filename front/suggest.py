@@ -0,0 +1,130 @@
+"""Qidiruv takliflari (autocomplete) uchun jarayon ichidagi prefiks/trigram indeks"""
+import bisect
+import threading
+import time
+
+from . import caching
+from .models import Course, CustomUser, UserType
+from .normalize import fold
+from .search import tokenize
+
+SUGGEST = 'suggest'
+MAX_AGE = 10 * 60  # seconds; safety net for changes that do not bump the version
+MIN_SIMILARITY = 0.3
+
+
+def trigrams(token):
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SuggestIndex:
+    """Kurs nomlari, fanlar va o'qituvchi ismlari bo'yicha indeks"""
+
+    def __init__(self, entries):
+        # entry: (suggestion dict, folded search key, weight)
+        self.entries = entries
+        self.tokens = []          # sorted (token, entry_id) pairs for prefix lookups
+        self.grams = {}           # trigram -> set of entry ids for fuzzy lookups
+        self.gram_counts = []     # number of distinct trigrams per entry
+
+        for entry_id, (_, text, _) in enumerate(entries):
+            entry_grams = set()
+            for token in set(tokenize(text)):
+                self.tokens.append((token, entry_id))
+                entry_grams |= trigrams(token)
+            for gram in entry_grams:
+                self.grams.setdefault(gram, set()).add(entry_id)
+            self.gram_counts.append(len(entry_grams))
+        self.tokens.sort()
+
+    def _prefix(self, prefix):
+        start = bisect.bisect_left(self.tokens, (prefix, -1))
+        found = set()
+        # Walk from the bisect position by index: slicing would copy the rest of the list on every keystroke
+        for i in range(start, len(self.tokens)):
+            token, entry_id = self.tokens[i]
+            if not token.startswith(prefix):
+                break
+            found.add(entry_id)
+        return found
+
+    def _fuzzy(self, tokens):
+        query_grams = set()
+        for token in tokens:
+            query_grams |= trigrams(token)
+        shared = {}
+        for gram in query_grams:
+            for entry_id in self.grams.get(gram, ()):
+                shared[entry_id] = shared.get(entry_id, 0) + 1
+        matches = {}
+        for entry_id, common in shared.items():
+            similarity = common / (len(query_grams) + self.gram_counts[entry_id] - common)
+            if similarity >= MIN_SIMILARITY:
+                matches[entry_id] = similarity
+        return matches
+
+    def lookup(self, query, limit=8):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # Every query token must be a prefix of some token in the entry
+        matched = None
+        for token in tokens:
+            found = self._prefix(token)
+            matched = found if matched is None else matched & found
+            if not matched:
+                break
+
+        if matched:
+            full = fold(query)
+            scored = [
+                (self.entries[entry_id][1].startswith(full), self.entries[entry_id][2], entry_id)
+                for entry_id in matched
+            ]
+        else:
+            # Nothing by prefix - fall back to trigram similarity (typos)
+            scored = [(similarity, self.entries[entry_id][2], entry_id) for entry_id, similarity in self._fuzzy(tokens).items()]
+
+        scored.sort(key=lambda item: (item[0], item[1], -item[2]), reverse=True)
+        return [self.entries[entry_id][0] for _, _, entry_id in scored[:limit]]
+
+
+def build_index():
+    """Indeksni bazadan qurish (2 ta so'rov)"""
+    entries = []
+
+    courses = Course.objects.filter(type=Course.TYPE_OPEN).values_list('id', 'title', 'subject', 'search_key', 'students_count')
+    for course_id, title, subject, search_key, students_count in courses:
+        suggestion = {'type': 'course', 'id': course_id, 'title': title, 'subject': subject}
+        entries.append((suggestion, search_key, students_count))
+
+    teachers = CustomUser.objects.filter(user_type=UserType.TEACHER).values_list(
+        'id', 'first_name', 'last_name', 'username', 'search_key', 'total_ratings'
+    )
+    for teacher_id, first_name, last_name, username, search_key, total_ratings in teachers:
+        name = f'{first_name} {last_name}'.strip() or username
+        suggestion = {'type': 'teacher', 'id': teacher_id, 'title': name, 'subject': None}
+        entries.append((suggestion, search_key, total_ratings))
+
+    return SuggestIndex(entries)
+
+
+_lock = threading.Lock()
+_state = {'index': None, 'version': None, 'built_at': 0}
+
+
+def get_index():
+    """Joriy indeks - versiya o'zgarsa yoki eskirsa qayta quriladi"""
+    version = caching.get_version(SUGGEST)
+    if _state['version'] != version or time.monotonic() - _state['built_at'] > MAX_AGE:
+        with _lock:
+            if _state['version'] != version or time.monotonic() - _state['built_at'] > MAX_AGE:
+                index = build_index()
+                _state.update(index=index, version=version, built_at=time.monotonic())
+    return _state['index']
+
+
+def suggest(query, limit=8):
+    return get_index().lookup(query, limit)
@@ -0,0 +1,115 @@
+"""O'qituvchi statistikasi (TeacherStats): yozishlarda F() bilan o'zgaradi, profil va panel bitta so'rov bilan o'qiydi"""
+from django.db.models import Count, Q
+
+from .counters import clamped
+from .models import Course, CourseStudent, CustomUser, Lesson, TeacherRating, TeacherStats, UserType
+
+COUNT_FIELDS = ('courses_count', 'open_courses_count', 'lessons_count', 'enrollments_count', 'students_count')
+
+
+def compute(teacher_ids):
+    """Jadvallardan hisoblash: {teacher_id: {maydon: qiymat}}"""
+    stats = {teacher_id: dict.fromkeys(COUNT_FIELDS + TeacherStats.RATING_FIELDS, 0) for teacher_id in teacher_ids}
+
+    courses = Course.objects.filter(teacher_id__in=teacher_ids).order_by().values('teacher_id').annotate(
+        total=Count('id'), open=Count('id', filter=Q(type=Course.TYPE_OPEN))
+    )
+    for row in courses:
+        stats[row['teacher_id']].update(courses_count=row['total'], open_courses_count=row['open'])
+
+    lessons = Lesson.objects.filter(course__teacher_id__in=teacher_ids).order_by().values('course__teacher_id').annotate(
+        total=Count('id')
+    )
+    for row in lessons:
+        stats[row['course__teacher_id']]['lessons_count'] = row['total']
+
+    enrollments = CourseStudent.objects.filter(course__teacher_id__in=teacher_ids).order_by().values(
+        'course__teacher_id'
+    ).annotate(total=Count('id'), students=Count('user', distinct=True))
+    for row in enrollments:
+        stats[row['course__teacher_id']].update(enrollments_count=row['total'], students_count=row['students'])
+
+    ratings = TeacherRating.objects.filter(teacher_id__in=teacher_ids).order_by().values('teacher_id', 'rating').annotate(
+        total=Count('id')
+    )
+    for row in ratings:
+        if 1 <= row['rating'] <= 5:
+            stats[row['teacher_id']][f"ratings_{row['rating']}"] = row['total']
+
+    return stats
+
+
+def rebuild(teacher_ids=None):
+    """Statistikani qayta qurish (hammasi yoki berilgan o'qituvchilar); yozilgan qatorlar soni"""
+    if teacher_ids is None:
+        teacher_ids = CustomUser.objects.filter(user_type=UserType.TEACHER).values_list('id', flat=True)
+    teacher_ids = list(teacher_ids)
+    fields = COUNT_FIELDS + TeacherStats.RATING_FIELDS
+    rows = [TeacherStats(teacher_id=teacher_id, **values) for teacher_id, values in compute(teacher_ids).items()]
+    TeacherStats.objects.bulk_create(rows, update_conflicts=True, unique_fields=['teacher'], update_fields=fields)
+    return len(rows)
+
+
+def adjust(teacher_id, **deltas):
+    """Hisoblagichlarni F() bilan o'zgartirish (qator yo'q bo'lsa birinchi o'qishda quriladi)"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    TeacherStats.objects.filter(pk=teacher_id).update(**{field: clamped(field, delta) for field, delta in deltas.items()})
+
+
+def for_teacher(teacher):
+    """O'qituvchi statistikasi (`select_related('stats')` bilan yuklangan bo'lsa qo'shimcha so'rovsiz)"""
+    try:
+        return teacher.stats
+    except TeacherStats.DoesNotExist:
+        rebuild([teacher.pk])
+        return TeacherStats.objects.get(pk=teacher.pk)
+
+
+# ---- Write hooks (called from front.signals) ----
+
+def course_saved(course, created):
+    is_open = int(course.type == Course.TYPE_OPEN)
+    loaded = getattr(course, '_loaded_owner', None)
+    if created:
+        adjust(course.teacher_id, courses_count=1, open_courses_count=is_open)
+    elif loaded is None:
+        # Previous owner and type unknown (instance not loaded from the DB)
+        rebuild([course.teacher_id])
+    elif loaded[0] != course.teacher_id:
+        # Lessons and enrollments of the course move with it
+        rebuild([loaded[0], course.teacher_id])
+    else:
+        adjust(course.teacher_id, open_courses_count=is_open - int(loaded[1] == Course.TYPE_OPEN))
+    course._loaded_owner = (course.teacher_id, course.type)
+
+
+def course_deleted(course):
+    # Lessons and enrollments deleted with the course send their own signals
+    adjust(course.teacher_id, courses_count=-1, open_courses_count=-int(course.type == Course.TYPE_OPEN))
+
+
+def lesson_changed(teacher_id, delta):
+    adjust(teacher_id, lessons_count=delta)
+
+
+def enrollment_changed(enrollment, teacher_id, delta):
+    # The student counts once per teacher: only their first enrollment adds, only the last one removes
+    others = CourseStudent.objects.filter(user_id=enrollment.user_id, course__teacher_id=teacher_id).exclude(pk=enrollment.pk)
+    adjust(teacher_id, enrollments_count=delta, students_count=0 if others.exists() else delta)
+
+
+def rating_saved(rating, created):
+    loaded = getattr(rating, '_loaded_rating', None)
+    if created:
+        adjust(rating.teacher_id, **{f'ratings_{rating.rating}': 1})
+    elif loaded is None:
+        rebuild([rating.teacher_id])
+    elif loaded != rating.rating:
+        adjust(rating.teacher_id, **{f'ratings_{loaded}': -1, f'ratings_{rating.rating}': 1})
+    rating._loaded_rating = rating.rating
+
+
+def rating_deleted(rating):
+    adjust(rating.teacher_id, **{f'ratings_{rating.rating}': -1})
@@ -0,0 +1,110 @@
+"""Vaqtli test sessiyalari: muddat, javoblarni qisman saqlash (autosave) va saqlangan holatdan yakunlash"""
+import datetime
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import grading, item_analysis, leaderboard
+from .models import CustomUser, StudentTest
+
+# Late requests (network delay, the auto-submit itself) are still accepted for this long
+GRACE_SECONDS = 30
+
+
+def is_expired(student_test, now=None):
+    if student_test.deadline is None:
+        return False
+    now = now or timezone.now()
+    return now > student_test.deadline + datetime.timedelta(seconds=GRACE_SECONDS)
+
+
+def remaining_seconds(student_test, now=None):
+    """Muddatgacha qolgan soniyalar (cheklov bo'lmasa None)"""
+    if student_test.deadline is None:
+        return None
+    now = now or timezone.now()
+    return max(0, int((student_test.deadline - now).total_seconds()))
+
+
+def start(user, course_test):
+    """Sessiyani boshlash yoki davom ettirish: (student_test, expired)
+
+    Tugallanmagan va muddati o'tmagan sessiya davom ettiriladi (sahifa yangilansa vaqt qaytadan boshlanmaydi).
+    """
+    with transaction.atomic():
+        student_test, created = StudentTest.objects.select_for_update().get_or_create(
+            course_test=course_test,
+            user=user,
+            defaults={'completed': False}
+        )
+        if student_test.completed:
+            return student_test, False
+        if student_test.started_at is not None:
+            return student_test, is_expired(student_test)
+
+        now = timezone.now()
+        student_test.score = None
+        student_test.started_at = now
+        student_test.deadline = (
+            now + datetime.timedelta(minutes=course_test.time_limit_minutes) if course_test.time_limit_minutes else None
+        )
+        student_test.saved_answers = {}
+        student_test.save(update_fields=['score', 'started_at', 'deadline', 'saved_answers'])
+    return student_test, False
+
+
+def save_answers(student_test_id, selected):
+    """Javoblarni sessiyaga qo'shish; yangilangan sessiyani qaytarish (muddat o'tgan bo'lsa saqlanmaydi)"""
+    with transaction.atomic():
+        student_test = StudentTest.objects.select_for_update().get(pk=student_test_id)
+        if student_test.completed or is_expired(student_test):
+            return student_test
+        if selected:
+            # JSON object keys are strings
+            student_test.saved_answers.update({str(question_id): answer_id for question_id, answer_id in selected.items()})
+            student_test.save(update_fields=['saved_answers'])
+    return student_test
+
+
+def stored_selection(student_test, answer_key):
+    """Saqlangan javoblar {question_id: answer_id} - joriy kalitga mos kelmaydiganlari tashlanadi"""
+    selected = {}
+    for question_id, answer_id in (student_test.saved_answers or {}).items():
+        question_id = int(question_id)
+        if question_id in answer_key and answer_id in answer_key[question_id][0]:
+            selected[question_id] = answer_id
+    return selected
+
+
+def finalize(student_test_id, answer_key, selected=None):
+    """Testni yakunlash: saqlangan holat (+ muddat ichida yuborilgan javoblar) bo'yicha baholash.
+
+    Natija: (student_test, stars_earned); allaqachon yakunlangan bo'lsa stars_earned None.
+    """
+    with transaction.atomic():
+        student_test = StudentTest.objects.select_for_update().get(pk=student_test_id)
+        if student_test.completed:
+            return student_test, None
+
+        answers = stored_selection(student_test, answer_key)
+        if selected and not is_expired(student_test):
+            answers.update(selected)
+
+        score = grading.score_for(grading.grade(answer_key, answers), len(answer_key))
+        stars_earned = grading.stars_for(score)
+
+        # Update user stars (NO COINS!)
+        if stars_earned > 0:
+            CustomUser.objects.filter(pk=student_test.user_id).update(stars=F('stars') + stars_earned)
+            leaderboard.refresh([student_test.user_id])
+
+        student_test.score = score
+        student_test.stars_earned = stars_earned
+        student_test.completed = True
+        student_test.saved_answers = {}
+        student_test.save(update_fields=['score', 'stars_earned', 'completed', 'saved_answers'])
+        grading.record_answers(student_test, answers)
+        item_analysis.attempts_changed(student_test.course_test_id)
+
+    return student_test, stars_earned
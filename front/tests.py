@@ -1,3 +1,95 @@
-from django.test import TestCase
+import base64
+import json
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import course_context, search
+from .models import Course, CourseStudent, CustomUser, Lesson, UserType
+from .pagination import keyset_page
+
+# Cache reads must not count as queries (the configured cache is database-backed)
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class CourseContextTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = CustomUser.objects.create_user('teacher', password='x', user_type=UserType.TEACHER)
+        cls.student = CustomUser.objects.create_user('student', password='x')
+        cls.course = Course.objects.create(title='Kurs', description='Tavsif', teacher=cls.teacher)
+        for order in range(1, 4):
+            Lesson.objects.create(course=cls.course, order=order, title=f'Dars {order}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_course_detail_query_budget(self):
+        with self.assertNumQueries(course_context.QUERY_BUDGET):
+            context = course_context.build_course_context(self.course.id, self.student)
+        self.assertFalse(context['is_enrolled'])
+        self.assertEqual(len(context['lessons']), 3)
+
+    def test_course_detail_query_budget_enrolled(self):
+        CourseStudent.objects.create(user=self.student, course=self.course)
+        for _ in range(2):
+            with self.assertNumQueries(course_context.QUERY_BUDGET):
+                context = course_context.build_course_context(self.course.id, self.student)
+            self.assertTrue(context['is_enrolled'])
+
+    def test_negative_enrollment_is_not_cached(self):
+        self.assertFalse(course_context.is_enrolled(self.student, self.course.id))
+        self.assertIsNone(course_context.get_enrollment(self.student.pk, self.course.id))
+
+    def test_unenroll_forgets_cached_enrollment(self):
+        enrollment = CourseStudent.objects.create(user=self.student, course=self.course)
+        self.assertTrue(course_context.is_enrolled(self.student, self.course.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.delete()
+        self.assertFalse(course_context.is_enrolled(self.student, self.course.id))
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = CustomUser.objects.create_user('teacher', password='x', user_type=UserType.TEACHER)
+        for _ in range(20):
+            Course.objects.create(title='Algebra asoslari', description='Tavsif', teacher=cls.teacher)
+        # Same text and same creation time: only the id tells the results apart
+        Course.objects.update(created_at=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+
+    def test_equal_rank_search_pages(self):
+        courses = search.search_courses(Course.objects.all(), 'algebra')
+        keys = ['-search_rank', '-created_at', '-id']
+        seen, cursor = [], None
+        while True:
+            page, cursor = keyset_page(courses, keys, cursor, per_page=3)
+            seen += [course.id for course in page]
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted(Course.objects.values_list('id', flat=True), reverse=True))
+
+    def test_wrong_typed_cursor_starts_from_first_page(self):
+        self.client.force_login(CustomUser.objects.create_user('student', password='x'))
+        cursor = base64.urlsafe_b64encode(json.dumps(['x', 1]).encode()).decode().rstrip('=')
+        for name in ('student:courses', 'student:teachers'):
+            response = self.client.get(reverse(name), {'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+
+
+class CounterFieldsTests(TestCase):
+    def test_stale_user_save_keeps_counters(self):
+        user = CustomUser.objects.create_user('teacher', password='x', user_type=UserType.TEACHER)
+        CustomUser.objects.filter(pk=user.pk).update(rating_sum=F('rating_sum') + 5, total_ratings=F('total_ratings') + 1)
+        user.bio = 'Yangi'
+        user.save()
+        user.refresh_from_db()
+        self.assertEqual((user.bio, user.rating_sum, user.total_ratings), ('Yangi', 5, 1))
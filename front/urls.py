@@ -19,6 +19,7 @@ urlpatterns = [
 
     # Protected pages (login_required)
     path('courses/', views.courses, name='courses'),
+    path('courses/suggest/', views.course_suggest, name='course_suggest'),
     path('courses/<int:course_id>/', views.course_detail, name='course_detail'),
     path('courses/<int:course_id>/enroll/', views.course_enroll, name='course_enroll'),
     path('lessons/<int:lesson_id>/', views.lesson_detail, name='lesson_detail'),
@@ -26,8 +27,10 @@ urlpatterns = [
     path('lessons/<int:lesson_id>/like/', views.lesson_like, name='lesson_like'),
     path('lessons/<int:lesson_id>/dislike/', views.lesson_dislike, name='lesson_dislike'),
     path('lessons/<int:lesson_id>/comment/', views.lesson_comment, name='lesson_comment'),
+    path('lessons/<int:lesson_id>/comments/', views.lesson_comments, name='lesson_comments'),
     path('teachers/', views.teachers, name='teachers'),
     path('teachers/<int:teacher_id>/', views.teacher_detail, name='teacher_detail'),
+    path('teachers/<int:teacher_id>/reviews/', views.teacher_reviews, name='teacher_reviews'),
     path('teachers/<int:teacher_id>/contact/', views.contact_teacher, name='contact_teacher'),
     path('teachers/<int:teacher_id>/rate/', views.rate_teacher, name='rate_teacher'),
     path('rating/', views.rating, name='rating'),
@@ -36,4 +39,5 @@ urlpatterns = [
     path('profile/picture/', views.profile_picture_upload, name='profile_picture_upload'),
     path('test/<int:test_id>/start/', views.start_test, name='start_test'),
 path('test/<int:test_id>/submit/', views.submit_test, name='submit_test'),
+    path('test/<int:test_id>/autosave/', views.autosave_test, name='autosave_test'),
 ]
\ No newline at end of file
@@ -1,12 +1,29 @@
 # student/views.py
+import json
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count
-from django.http import JsonResponse
-from django.core.paginator import Paginator
+from django.db.models import Count
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
 from .models import *
+from . import caching, completion, conditional, course_context, directory, events, facets, grading, leaderboard, outline, ratings, reactions, search, suggest, teacher_stats, test_sessions
+from .pagination import keyset_page
+
+COURSES_PER_PAGE = 9
+TEACHERS_PER_PAGE = 12
+TEACHER_KEYS = ['-ranking_score', '-id']
+SUGGEST_LIMIT = 8
+COMMENTS_PER_PAGE = 20
+COMMENT_KEYS = ['-created_at', '-id']
+TOP_STUDENTS = 50
+RANK_NEIGHBORS = 2
+REVIEWS_PER_PAGE = 10
+REVIEW_KEYS = ['-created_at', '-id']
 
 # Authentication Views
 def login_view(request):
@@ -172,67 +189,86 @@ def courses(request):
     search_query = request.GET.get('search', '')
     category_id = request.GET.get('category', '')
     grade = request.GET.get('grade', '')
-    page_number = request.GET.get('page', 1)
+    cursor = request.GET.get('cursor')
 
     # Base queryset - only OPEN courses
-    courses_list = Course.objects.filter(type=Course.TYPE_OPEN).select_related('teacher', 'category').prefetch_related('students', 'lessons')
+    courses_list = Course.objects.filter(type=Course.TYPE_OPEN).select_related('teacher', 'category').defer(*Course.LIST_DEFERRED)
 
-    # Apply filters
+    # Full-text search (ranked)
     if search_query:
-        courses_list = courses_list.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(subject__icontains=search_query)
-        )
+        courses_list = search.search_courses(courses_list, search_query)
 
+    # Facets are counted over the search results before category/grade filters
+    facet_queryset = courses_list
+
+    # Apply filters
     if category_id:
         courses_list = courses_list.filter(category_id=category_id)
 
     if grade:
         courses_list = courses_list.filter(grade=grade)
 
-    # Annotate with counts
-    courses_list = courses_list.annotate(
-        students_count=Count('students', distinct=True),
-        lessons_count=Count('lessons', distinct=True)
-    )
-
-    # Pagination
-    paginator = Paginator(courses_list, 9)  # 9 courses per page
-    courses_page = paginator.get_page(page_number)
-
-    # Get all categories for filter
-    categories = CourseCategory.objects.all()
+    # Keyset pagination - no OFFSET, no COUNT(*)
+    keys = ['-created_at', '-id']
+    if 'search_rank' in courses_list.query.annotations:
+        keys = ['-search_rank'] + keys
 
-    # AJAX request - return JSON
+    # AJAX request - return JSON, served from the versioned cache when possible
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        courses_data = []
-        for course in courses_page:
-            courses_data.append({
-                'id': course.id,
-                'title': course.title,
-                'description': course.description,
-                'subject': course.subject,
-                'grade': course.grade,
-                'background_image': course.background_image.url if course.background_image else None,
-                'teacher': {
-                    'name': course.teacher.get_full_name(),
-                    'initials': f"{course.teacher.first_name[0]}{course.teacher.last_name[0]}" if course.teacher.first_name and course.teacher.last_name else course.teacher.username[0:2].upper()
-                },
-                'students_count': course.students_count,
-                'lessons_count': course.lessons_count
-            })
+        page_key = caching.catalog_page_key(search_query, category_id, grade, cursor)
+        page = caching.get_page(page_key)
 
-        return JsonResponse({
-            'courses': courses_data,
-            'has_more': courses_page.has_next()
-        })
+        if page is not None:
+            course_ids, next_cursor, payload = page
+        else:
+            # Only the page's ids come from the catalog query; card data comes from the card cache
+            ids_page, next_cursor = keyset_page(
+                courses_list.select_related(None).only('id', 'created_at'), keys, cursor, per_page=COURSES_PER_PAGE
+            )
+            course_ids = [course.id for course in ids_page]
+            payload = None
+
+        if payload is None:
+            courses_data, versions = caching.get_cards(
+                course_ids, lambda ids: Course.objects.filter(id__in=ids).select_related('teacher').defer(*Course.LIST_DEFERRED)
+            )
+            data = {
+                'courses': courses_data,
+                'next_cursor': next_cursor
+            }
+            if not cursor:
+                course_facets = facets.get_facets(facet_queryset, search_query, category_id, grade)
+                data['facets'] = {
+                    'categories': [{'id': key, 'count': value} for key, value in course_facets['categories'].items()],
+                    'grades': [{'grade': key, 'count': value} for key, value in course_facets['grades'].items()],
+                }
+            payload = json.dumps(data)
+            caching.set_page(page_key, course_ids, next_cursor, versions, payload)
+
+        # Polling clients get a 304 while the payload is unchanged
+        etag = quote_etag(conditional.payload_etag(payload))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = HttpResponse(payload, content_type='application/json')
+        response.headers['ETag'] = etag
+        return response
+
+    courses_page, next_cursor = keyset_page(courses_list, keys, cursor, per_page=COURSES_PER_PAGE)
+
+    course_facets = facets.get_facets(facet_queryset, search_query, category_id, grade)
+    categories = list(CourseCategory.objects.all())
+    for category in categories:
+        category.courses_count = course_facets['categories'].get(category.id, 0)
+    grades = [{'value': value, 'count': course_facets['grades'].get(value, 0)} for value in facets.GRADES]
 
     # Normal request - render template
     context = {
         'courses': courses_page,
         'categories': categories,
-        'has_more': courses_page.has_next(),
+        'grades': grades,
+        'has_more': next_cursor is not None,
+        'next_cursor': next_cursor,
         'search_query': search_query,
         'selected_category': category_id,
         'selected_grade': grade,
@@ -242,36 +278,27 @@ def courses(request):
 
 
 @login_required(login_url='student:login')
-def course_detail(request, course_id):
-    """Kurs detallari"""
-    course = get_object_or_404(Course, id=course_id, type=Course.TYPE_OPEN)
-
-    # Get course lessons
-    lessons = Lesson.objects.filter(course=course).order_by('order')
-
-    # Check if user is enrolled
-    is_enrolled = CourseStudent.objects.filter(user=request.user, course=course).exists()
+def course_suggest(request):
+    """Qidiruv takliflari (autocomplete) - JSON"""
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', SUGGEST_LIMIT)), 1), 20)
+    except ValueError:
+        limit = SUGGEST_LIMIT
 
-    # Get statistics
-    students_count = CourseStudent.objects.filter(course=course).count()
-    lessons_count = lessons.count()
+    suggestions = [
+        dict(item, url=reverse('student:course_detail' if item['type'] == 'course' else 'student:teacher_detail', args=[item['id']]))
+        for item in (suggest.suggest(query, limit) if query.strip() else [])
+    ]
 
-    # Get reviews if available
-    try:
-        from .models import Review
-        reviews = Review.objects.filter(course=course).select_related('user').order_by('-created_at')[:5]
-    except:
-        reviews = []
+    return JsonResponse({'suggestions': suggestions})
 
-    context = {
-        'course': course,
-        'lessons': lessons,
-        'is_enrolled': is_enrolled,
-        'students_count': students_count,
-        'lessons_count': lessons_count,
-        'reviews': reviews,
-    }
 
+@login_required(login_url='student:login')
+@condition(etag_func=conditional.course_etag, last_modified_func=conditional.course_last_modified)
+def course_detail(request, course_id):
+    """Kurs detallari"""
+    context = course_context.build_course_context(course_id, request.user)
     return render(request, 'student/course_detail.html', context)
 
 
@@ -299,32 +326,27 @@ def course_enroll(request, course_id):
 @login_required(login_url='student:login')
 def teachers(request):
     """O'qituvchilar sahifasi"""
-    from django.db.models import Avg
+    search_query = request.GET.get('search', '')
+    cursor = request.GET.get('cursor')
 
-    # Get all teachers with courses count
-    teachers_list = CustomUser.objects.filter(
-        user_type='teacher'
-    ).select_related().prefetch_related('courses').order_by('-rating')
+    # Course counts come from the same query - no prefetch, no per-card COUNT
+    teachers_list = CustomUser.objects.filter(user_type='teacher').annotate(courses_count=Count('courses'))
 
-    # Get unique specializations for filter
-    specializations = CustomUser.objects.filter(
-        user_type='teacher',
-        specialization__isnull=False
-    ).exclude(specialization='').values_list('specialization', flat=True).distinct()
+    # Search by script-folded name, so Latin and Cyrillic spellings both match
+    if search_query:
+        teachers_list = search.filter_by_key(teachers_list, search_query)
+
+    teachers_page, next_cursor = keyset_page(teachers_list, TEACHER_KEYS, cursor, per_page=TEACHERS_PER_PAGE)
 
-    # Statistics
-    total_teachers = teachers_list.count()
-    total_courses = Course.objects.filter(teacher__user_type='teacher').count()
-    avg_rating = teachers_list.aggregate(avg=Avg('rating'))['avg'] or 0
-    avg_experience = teachers_list.aggregate(avg=Avg('experience_years'))['avg'] or 0
+    # Header statistics from the cached snapshot
+    stats = directory.get_stats()
 
     context = {
-        'teachers': teachers_list,
-        'specializations': specializations,
-        'total_teachers': total_teachers,
-        'total_courses': total_courses,
-        'avg_rating': avg_rating,
-        'avg_experience': avg_experience,
+        'teachers': teachers_page,
+        'has_more': next_cursor is not None,
+        'next_cursor': next_cursor,
+        'search_query': search_query,
+        **stats,
     }
 
     return render(request, 'student/teachers.html', context)
@@ -334,42 +356,62 @@ def teachers(request):
 # Replace in your views.py file
 
 @login_required(login_url='student:login')
+@condition(etag_func=conditional.teacher_etag, last_modified_func=conditional.teacher_last_modified)
 def teacher_detail(request, teacher_id):
     """O'qituvchi profili"""
-    teacher = get_object_or_404(CustomUser, id=teacher_id, user_type='teacher')
+    # Statistics come from the materialized TeacherStats row in the same query
+    teacher = get_object_or_404(CustomUser.objects.select_related('stats'), id=teacher_id, user_type='teacher')
+    stats = teacher_stats.for_teacher(teacher)
 
-    # Get teacher's courses - FIXED: use 'students' and 'lessons' (lowercase)
+    # Get teacher's courses (students_count / lessons_count are stored on Course)
     courses = Course.objects.filter(
         teacher=teacher,
         type=Course.TYPE_OPEN
-    ).annotate(
-        students_count=Count('students'),  # FIX: was 'coursestudent'
-        lessons_count=Count('lessons')      # FIX: was 'lesson'
-    )
+    ).defer(*Course.LIST_DEFERRED)
 
-    # Statistics
-    courses_count = courses.count()
-    students_count = CourseStudent.objects.filter(course__teacher=teacher).values('user').distinct().count()
-    lessons_count = Lesson.objects.filter(course__teacher=teacher).count()
-
-    # Get teacher reviews - ADDED
-    try:
-        reviews = TeacherRating.objects.filter(teacher=teacher).select_related('user').order_by('-created_at')
-    except:
-        reviews = []
+    # First page of reviews; the rest is loaded from teacher_reviews
+    reviews, reviews_cursor = keyset_page(
+        TeacherRating.objects.filter(teacher=teacher).select_related('user'), REVIEW_KEYS, per_page=REVIEWS_PER_PAGE
+    )
 
     context = {
         'teacher': teacher,
         'courses': courses,
-        'courses_count': courses_count,
-        'students_count': students_count,
-        'lessons_count': lessons_count,
-        'reviews': reviews,  # ADDED for template
+        'stats': stats,
+        'courses_count': stats.open_courses_count,
+        'students_count': stats.students_count,
+        'lessons_count': stats.lessons_count,
+        'reviews': reviews,
+        'reviews_cursor': reviews_cursor,
     }
 
     return render(request, 'student/teacher_detail.html', context)
 
 
+@login_required(login_url='student:login')
+def teacher_reviews(request, teacher_id):
+    """O'qituvchi sharhlari - keyingi sahifa (JSON)"""
+    reviews, next_cursor = keyset_page(
+        TeacherRating.objects.filter(teacher_id=teacher_id).select_related('user'),
+        REVIEW_KEYS, request.GET.get('cursor'), per_page=REVIEWS_PER_PAGE
+    )
+
+    return JsonResponse({
+        'reviews': [
+            {
+                'id': review.id,
+                'author': review.user.get_full_name(),
+                'initial': review.user.first_name[:1].upper(),
+                'rating': review.rating,
+                'review': review.review or '',
+                'created_at': timezone.localtime(review.created_at).strftime('%d.%m.%Y'),
+            }
+            for review in reviews
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
 # BONUS: Add these views for teacher profile functionality
 
 @login_required(login_url='student:login')
@@ -377,27 +419,17 @@ def rate_teacher(request, teacher_id):
     """O'qituvchini baholash"""
     if request.method == 'POST':
         teacher = get_object_or_404(CustomUser, id=teacher_id, user_type='teacher')
-        rating_value = request.POST.get('rating')
+        try:
+            rating_value = int(request.POST.get('rating'))
+        except (TypeError, ValueError):
+            rating_value = 0
+        if not 1 <= rating_value <= 5:
+            messages.error(request, 'Baho 1 dan 5 gacha bo\'lishi kerak!')
+            return redirect('student:teacher_detail', teacher_id=teacher_id)
         review_text = request.POST.get('review', '')
 
-        # Create or update rating
-        rating, created = TeacherRating.objects.update_or_create(
-            user=request.user,
-            teacher=teacher,
-            defaults={
-                'rating': int(rating_value),
-                'review': review_text
-            }
-        )
-
-        # Update teacher's average rating
-        from django.db.models import Avg
-        avg_rating = TeacherRating.objects.filter(teacher=teacher).aggregate(Avg('rating'))['rating__avg']
-        total_ratings = TeacherRating.objects.filter(teacher=teacher).count()
-
-        teacher.rating = round(avg_rating, 1) if avg_rating else 0
-        teacher.total_ratings = total_ratings
-        teacher.save()
+        # Create or update rating; the teacher's sum, count and average change by the delta only
+        ratings.rate(request.user, teacher, rating_value, review_text)
 
         messages.success(request, 'Baholash muvaffaqiyatli saqlandi!')
         return redirect('student:teacher_detail', teacher_id=teacher_id)
@@ -428,20 +460,23 @@ def contact_teacher(request, teacher_id):
 @login_required(login_url='student:login')
 def lesson_detail(request, lesson_id):
     """Dars tafsilotlari - test bilan"""
-    lesson = get_object_or_404(Lesson, id=lesson_id)
+    lessons = reactions.with_user_reaction(Lesson.objects.select_related('course'), request.user)
+    lesson = get_object_or_404(lessons, id=lesson_id)
     course = lesson.course
 
     # Check enrollment
-    is_enrolled = CourseStudent.objects.filter(user=request.user, course=course).exists()
+    is_enrolled = course_context.is_enrolled(request.user, course.id)
     if not is_enrolled:
         messages.error(request, 'Avval kursga yoziling!')
         return redirect('student:course_detail', course_id=course.id)
 
-    # Get all lessons
-    all_lessons = Lesson.objects.filter(course=course).order_by('order')
+    # Lesson navigation from the cached course outline
+    course_outline = outline.get_outline(course.id, lesson.id)
+    all_lessons = course_outline.lessons
 
-    # Next lesson
-    next_lesson = all_lessons.filter(order__gt=lesson.order).first()
+    # Previous / next lesson
+    prev_lesson = course_outline.previous(lesson.id)
+    next_lesson = course_outline.next(lesson.id)
 
     # Check if this is last lesson
     is_last_lesson = not next_lesson
@@ -459,41 +494,47 @@ def lesson_detail(request, lesson_id):
                     student_test = StudentTest.objects.get(course_test=course_test, user=request.user)
                     if student_test.completed:
                         # Calculate details for result display
+                        answer_key = grading.get_answer_key(course_test.id)
+                        total_questions = len(answer_key)
+                        correct_answers = grading.correct_count(student_test, answer_key)
                         test_result = {
                             'score': student_test.score,
-                            'correct_answers': int(student_test.score / 100 * course_test.questions.count()),
-                            'wrong_answers': course_test.questions.count() - int(student_test.score / 100 * course_test.questions.count()),
-                            'total_questions': course_test.questions.count(),
+                            'correct_answers': correct_answers,
+                            'wrong_answers': total_questions - correct_answers,
+                            'total_questions': total_questions,
                         }
                 except StudentTest.DoesNotExist:
                     pass
         except:
             pass
 
-    # Like/dislike stats
-    likes_count = LessonLikeDislike.objects.filter(lesson=lesson, is_like=True).count()
-    dislikes_count = LessonLikeDislike.objects.filter(lesson=lesson, is_like=False).count()
-
-    # User reaction
-    user_reaction = None
-    try:
-        user_like = LessonLikeDislike.objects.get(user=request.user, lesson=lesson)
-        user_reaction = 'like' if user_like.is_like else 'dislike'
-    except LessonLikeDislike.DoesNotExist:
-        pass
-
-    # Comments
-    comments = Comment.objects.filter(course=course).select_related('user').order_by('-created_at')
+    # Like/dislike stats (stored counters) and the user's own reaction (annotated), reconciled with the event buffer
+    events.record_view(lesson.id)
+    lesson_counts = events.lesson_counts(lesson)
+    likes_count = lesson_counts['likes_count']
+    dislikes_count = lesson_counts['dislikes_count']
+    user_reaction = reactions.reaction_name(events.user_reaction(request.user.id, lesson.id, lesson.user_is_like))
+
+    # Comments - first page inline, older ones via lesson_comments
+    comments_scope = 'lesson' if request.GET.get('scope') == 'lesson' else 'course'
+    comments, comments_cursor = keyset_page(
+        _comment_threads(lesson, comments_scope), COMMENT_KEYS, per_page=COMMENTS_PER_PAGE
+    )
+    comments_count = course.comments_count if comments_scope == 'course' else _comment_threads(lesson, 'lesson').count()
 
-    # Calculate course progress (simplified - just based on number of lessons viewed)
-    total_lessons = all_lessons.count()
-    current_lesson_index = list(all_lessons).index(lesson) + 1
-    course_progress = int((current_lesson_index / total_lessons * 100)) if total_lessons > 0 else 0
+    # Course progress from the lessons this user actually completed
+    total_lessons = len(course_outline)
+    current_lesson_index = course_outline.position(lesson.id) + 1
+    completed_lessons = completion.get_completed(request.user.id, course.id)
+    course_progress = completion.outline_progress(completed_lessons, course_outline)
 
     context = {
         'lesson': lesson,
         'course': course,
         'all_lessons': all_lessons,
+        'total_lessons': total_lessons,
+        'current_lesson_index': current_lesson_index,
+        'prev_lesson': prev_lesson,
         'next_lesson': next_lesson,
         'is_last_lesson': is_last_lesson,
         'course_test': course_test,
@@ -501,50 +542,105 @@ def lesson_detail(request, lesson_id):
         'course_progress': course_progress,
         'likes_count': likes_count,
         'dislikes_count': dislikes_count,
+        'views_count': lesson_counts['views_count'],
         'user_reaction': user_reaction,
         'comments': comments,
+        'comments_count': comments_count,
+        'comments_cursor': comments_cursor,
+        'comments_scope': comments_scope,
     }
 
     return render(request, 'student/lesson_detail.html', context)
 
 
+def _comment_threads(lesson, scope):
+    """Kurs yoki faqat shu dars izohlari"""
+    if scope == 'lesson':
+        return Comment.objects.filter(lesson=lesson).select_related('user')
+    return Comment.objects.filter(course_id=lesson.course_id).select_related('user')
+
+
+@login_required(login_url='student:login')
+def lesson_comments(request, lesson_id):
+    """Dars izohlari - keyingi sahifa (JSON)"""
+    lesson = get_object_or_404(Lesson.objects.only('id', 'course_id'), id=lesson_id)
+    if not course_context.is_enrolled(request.user, lesson.course_id):
+        return JsonResponse({'error': 'Avval kursga yoziling!'}, status=403)
+
+    scope = 'lesson' if request.GET.get('scope') == 'lesson' else 'course'
+    comments, next_cursor = keyset_page(
+        _comment_threads(lesson, scope), COMMENT_KEYS, request.GET.get('cursor'), per_page=COMMENTS_PER_PAGE
+    )
+
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.id,
+                'author': comment.user.get_full_name(),
+                'initial': (comment.user.first_name[:1] or 'U').upper(),
+                'content': comment.content,
+                'created_at': timezone.localtime(comment.created_at).strftime('%d.%m.%Y %H:%M'),
+            }
+            for comment in comments
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
 @login_required(login_url='student:login')
 def start_test(request, test_id):
-    """Start a test"""
+    """Start a test (or resume the running session)"""
     if request.method == 'POST':
         course_test = get_object_or_404(CourseTest, id=test_id)
 
-        # Check if user already completed the test
-        student_test = StudentTest.objects.filter(
-            course_test=course_test,
-            user=request.user
-        ).first()
+        student_test, expired = test_sessions.start(request.user, course_test)
 
-        if student_test and student_test.completed:
+        # Check if user already completed the test
+        if student_test.completed:
             messages.info(request, 'Siz bu testni allaqachon topshirgansiz!')
-            # Redirect back to last lesson
-            last_lesson = Lesson.objects.filter(course=course_test.course).order_by('-order').first()
-            if last_lesson:
-                return redirect('student:lesson_detail', lesson_id=last_lesson.id)
-            return redirect('student:course_detail', course_id=course_test.course.id)
-
-        # Get or create test attempt (incomplete)
-        student_test, created = StudentTest.objects.get_or_create(
-            course_test=course_test,
-            user=request.user,
-            defaults={'completed': False}
-        )
+            return _after_test_redirect(course_test)
 
-        # If already exists but not completed, allow retake
-        if not created and not student_test.completed:
-            student_test.score = None
-            student_test.save()
+        # Time ran out while the student was away - finish with what was autosaved
+        if expired:
+            return _finish_test(request, course_test, student_test)
 
-        return render(request, 'student/test_take.html', {'test': course_test})
+        # A resumed session starts from the saved answers and the time actually left
+        saved_answers = student_test.saved_answers or {}
+        total_questions = course_test.questions.count()
+        remaining_seconds = test_sessions.remaining_seconds(student_test)
+        return render(request, 'student/test_take.html', {
+            'test': course_test,
+            'saved_answer_ids': set(saved_answers.values()),
+            'answered_count': len(saved_answers),
+            'progress_percent': round(len(saved_answers) * 100 / total_questions) if total_questions else 0,
+            'remaining_seconds': remaining_seconds,
+            'remaining_time': None if remaining_seconds is None else f'{remaining_seconds // 60}:{remaining_seconds % 60:02d}',
+        })
 
     return redirect('student:courses')
 
 
+@login_required(login_url='student:login')
+def autosave_test(request, test_id):
+    """Javoblarni qisman saqlash (JSON) - bir nechta `question_<id>=<answer_id>` bir so'rovda"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST talab qilinadi'}, status=405)
+
+    student_test = StudentTest.objects.filter(course_test_id=test_id, user=request.user).only('id').first()
+    if student_test is None:
+        return JsonResponse({'error': 'Test boshlanmagan'}, status=404)
+
+    answer_key = grading.get_answer_key(test_id)
+    student_test = test_sessions.save_answers(student_test.id, grading.selected_answers(answer_key, request.POST))
+
+    if student_test.completed or test_sessions.is_expired(student_test):
+        return JsonResponse({'error': 'Test yakunlangan', 'expired': True}, status=409)
+    return JsonResponse({
+        'saved': len(student_test.saved_answers),
+        'remaining_seconds': test_sessions.remaining_seconds(student_test),
+    })
+
+
 @login_required(login_url='student:login')
 def submit_test(request, test_id):
     """Submit test and calculate score with star rewards"""
@@ -560,59 +656,36 @@ def submit_test(request, test_id):
 
         if student_test.completed:
             messages.info(request, 'Siz bu testni allaqachon topshirgansiz!')
-            last_lesson = Lesson.objects.filter(course=course_test.course).order_by('-order').first()
-            return redirect('student:lesson_detail', lesson_id=last_lesson.id)
+            return _after_test_redirect(course_test)
 
-        # Calculate score
-        total_questions = course_test.questions.count()
-        correct_answers = 0
-
-        for question in course_test.questions.all():
-            selected_answer_id = request.POST.get(f'question_{question.id}')
-            if selected_answer_id:
-                selected_answer = TestAnswer.objects.filter(id=selected_answer_id).first()
-                if selected_answer and selected_answer.is_correct:
-                    correct_answers += 1
-
-        # Calculate percentage
-        score = (correct_answers / total_questions * 100) if total_questions > 0 else 0
-
-        # Award stars based on score (NO COINS!)
-        stars_earned = 0
-        if score >= 90:
-            stars_earned = 5
-        elif score >= 80:
-            stars_earned = 4
-        elif score >= 70:
-            stars_earned = 3
-        elif score >= 60:
-            stars_earned = 2
-        elif score >= 50:
-            stars_earned = 1
-
-        # Update user stars (NO COINS!)
-        if stars_earned > 0:
-            request.user.stars += stars_earned
-            request.user.save()
-
-        # Save test result
-        student_test.score = score
-        student_test.completed = True
-        student_test.save()
-
-        if stars_earned > 0:
-            messages.success(request, f'Test yakunlandi! +{stars_earned} yulduz ⭐')
-        else:
-            messages.info(request, 'Test yakunlandi! Qayta urinib ko\'ring.')
+        return _finish_test(request, course_test, student_test)
 
-        # Redirect to last lesson to show results
-        last_lesson = Lesson.objects.filter(course=course_test.course).order_by('-order').first()
-        if last_lesson:
-            return redirect('student:lesson_detail', lesson_id=last_lesson.id)
+    return redirect('student:courses')
 
-        return redirect('student:course_detail', course_id=course_test.course.id)
 
-    return redirect('student:courses')
+def _finish_test(request, course_test, student_test):
+    """Autosaved answers plus the submitted form (if still in time) are graded from the cached answer key"""
+    answer_key = grading.get_answer_key(course_test.id)
+    student_test, stars_earned = test_sessions.finalize(
+        student_test.id, answer_key, grading.selected_answers(answer_key, request.POST)
+    )
+
+    if stars_earned is None:
+        messages.info(request, 'Siz bu testni allaqachon topshirgansiz!')
+    elif stars_earned > 0:
+        messages.success(request, f'Test yakunlandi! +{stars_earned} yulduz ⭐')
+    else:
+        messages.info(request, 'Test yakunlandi! Qayta urinib ko\'ring.')
+
+    return _after_test_redirect(course_test)
+
+
+def _after_test_redirect(course_test):
+    # Redirect to last lesson to show results
+    last_lesson = Lesson.objects.filter(course_id=course_test.course_id).order_by('-order').only('id').first()
+    if last_lesson:
+        return redirect('student:lesson_detail', lesson_id=last_lesson.id)
+    return redirect('student:course_detail', course_id=course_test.course_id)
 
 
 # ALSO REMOVE COINS/STARS FROM lesson_complete:
@@ -634,6 +707,7 @@ def lesson_complete(request, lesson_id):
             progress.is_completed = True
             progress.completed_at = timezone.now()
             progress.save()
+            completion.add(request.user.id, lesson.course_id, lesson.id)
 
             messages.success(request, 'Dars yakunlandi!')
 
@@ -644,55 +718,41 @@ def lesson_complete(request, lesson_id):
 @login_required(login_url='student:login')
 def lesson_like(request, lesson_id):
     """Darsga like"""
-    if request.method == 'POST':
-        from .models import LessonLikeDislike
-        lesson = get_object_or_404(Lesson, id=lesson_id)
-
-        like_dislike, created = LessonLikeDislike.objects.get_or_create(
-            user=request.user,
-            lesson=lesson,
-            defaults={'is_like': True}
-        )
-
-        if not created:
-            if like_dislike.is_like:
-                # Remove like
-                like_dislike.delete()
-            else:
-                # Change from dislike to like
-                like_dislike.is_like = True
-                like_dislike.save()
-
-        return redirect('student:lesson_detail', lesson_id=lesson_id)
-
-    return redirect('student:courses')
+    return _lesson_react(request, lesson_id, is_like=True)
 
 
 @login_required(login_url='student:login')
 def lesson_dislike(request, lesson_id):
     """Darsga dislike"""
-    if request.method == 'POST':
-        from .models import LessonLikeDislike
-        lesson = get_object_or_404(Lesson, id=lesson_id)
+    return _lesson_react(request, lesson_id, is_like=False)
 
-        like_dislike, created = LessonLikeDislike.objects.get_or_create(
-            user=request.user,
-            lesson=lesson,
-            defaults={'is_like': False}
-        )
 
-        if not created:
-            if not like_dislike.is_like:
-                # Remove dislike
-                like_dislike.delete()
-            else:
-                # Change from like to dislike
-                like_dislike.is_like = False
-                like_dislike.save()
+def _lesson_react(request, lesson_id, is_like):
+    """Reaksiyani almashtirish - AJAX so'rovga JSON, oddiy formaga redirect"""
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    if request.method != 'POST':
+        if is_ajax:
+            return JsonResponse({'error': 'POST talab qilinadi'}, status=405)
+        return redirect('student:courses')
 
-        return redirect('student:lesson_detail', lesson_id=lesson_id)
+    lesson = get_object_or_404(Lesson.objects.only('id', 'course_id', *Lesson.COUNTER_FIELDS), id=lesson_id)
+    if not course_context.is_enrolled(request.user, lesson.course_id):
+        if is_ajax:
+            return JsonResponse({'error': 'Avval kursga yoziling!'}, status=403)
+        messages.error(request, 'Avval kursga yoziling!')
+        return redirect('student:course_detail', course_id=lesson.course_id)
 
-    return redirect('student:courses')
+    # Buffered - written to the database in batches by front.events
+    reaction = events.toggle_reaction(request.user.id, lesson.id, is_like)
+
+    if is_ajax:
+        lesson_counts = events.lesson_counts(lesson)
+        return JsonResponse({
+            'reaction': reactions.reaction_name(reaction),
+            'likes_count': lesson_counts['likes_count'],
+            'dislikes_count': lesson_counts['dislikes_count'],
+        })
+    return redirect('student:lesson_detail', lesson_id=lesson_id)
 
 
 @login_required(login_url='student:login')
@@ -706,6 +766,7 @@ def lesson_comment(request, lesson_id):
             Comment.objects.create(
                 user=request.user,
                 course=lesson.course,
+                lesson=lesson,
                 content=content
             )
             messages.success(request, 'Izoh qo\'shildi!')
@@ -718,11 +779,42 @@ def lesson_comment(request, lesson_id):
 @login_required(login_url='student:login')
 def rating(request):
     """Reyting sahifasi"""
-    # Top students by coins
-    top_students = CustomUser.objects.filter(user_type='student').order_by('-coins', '-stars')[:50]
+    level = request.GET.get('level', '')
+    if level not in UserLevel.values:
+        level = ''
+
+    # Order and ranks come from the in-memory leaderboard; the rows are loaded by id
+    top_ids = leaderboard.top(TOP_STUDENTS, level or None)
+    my_rank = leaderboard.rank(request.user.pk, level or None)
+    first_neighbor, neighbor_ids = None, []
+    if my_rank is not None and my_rank > TOP_STUDENTS:
+        first_neighbor, neighbor_ids = leaderboard.around(request.user.pk, level or None, radius=RANK_NEIGHBORS)
+        # Neighbors that reach into the top list are already shown there
+        skip = max(TOP_STUDENTS + 1 - first_neighbor, 0)
+        first_neighbor, neighbor_ids = first_neighbor + skip, neighbor_ids[skip:]
+
+    users = CustomUser.objects.in_bulk(top_ids + neighbor_ids)
+    top_students = []
+    for rank, user_id in enumerate(top_ids, start=1):
+        if user_id in users:
+            users[user_id].rank = rank
+            top_students.append(users[user_id])
+    neighbors = []
+    for rank, user_id in enumerate(neighbor_ids, start=first_neighbor or 1):
+        if user_id in users:
+            users[user_id].rank = rank
+            neighbors.append(users[user_id])
+    if neighbors and first_neighbor > TOP_STUDENTS + 1:
+        # Only mark a gap when ranks between the top list and the neighbors are hidden
+        neighbors[0].gap_before = True
 
     context = {
         'top_students': top_students,
+        'leaderboard_rows': top_students + neighbors,
+        'my_rank': my_rank,
+        'total_students': leaderboard.size(level or None),
+        'level': level,
+        'levels': UserLevel.choices,
     }
 
     return render(request, 'student/rating.html', context)
@@ -734,7 +826,11 @@ def profile(request):
     user = request.user
 
     # Get user's enrolled courses
-    enrolled_courses = CourseStudent.objects.filter(user=user).select_related('course', 'course__teacher')
+    enrolled_courses = CourseStudent.objects.filter(user=user).select_related('course', 'course__teacher').defer(
+        *(f'course__{field}' for field in Course.LIST_DEFERRED)
+    )
+    enrolled_courses = list(enrolled_courses)
+    completion.attach(enrolled_courses)
 
     context = {
         'user': user,
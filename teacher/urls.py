@@ -28,6 +28,7 @@ urlpatterns = [
     # Tests
     path('courses/<int:course_id>/tests/add/', views.add_test, name='add_test'),
     path('tests/<int:test_id>/edit/', views.edit_test, name='edit_test'),
+    path('tests/<int:test_id>/analysis/', views.test_analysis, name='test_analysis'),
     path('tests/<int:test_id>/delete/', views.delete_test, name='delete_test'),
 
     # Students
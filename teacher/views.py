@@ -2,8 +2,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.db import transaction
 from django.db.models import Count
 from front.models import *
+from front import authoring, completion, grading, item_analysis, regrade, teacher_stats
 from django.contrib.auth import authenticate, login, logout
 from functools import wraps
 
@@ -94,16 +96,15 @@ def teacher_logout(request):
 # Dashboard
 @teacher_required
 def teacher_dashboard(request):
-    courses = Course.objects.filter(teacher=request.user)
-    total_courses = courses.count()
-    total_students = CourseStudent.objects.filter(course__teacher=request.user).count()
-    total_lessons = Lesson.objects.filter(course__teacher=request.user).count()
+    courses = Course.objects.filter(teacher=request.user).defer(*Course.LIST_DEFERRED)
+    stats = teacher_stats.for_teacher(request.user)
     recent_courses = courses[:5]
 
     context = {
-        'total_courses': total_courses,
-        'total_students': total_students,
-        'total_lessons': total_lessons,
+        'stats': stats,
+        'total_courses': stats.courses_count,
+        'total_students': stats.students_count,
+        'total_lessons': stats.lessons_count,
         'recent_courses': recent_courses,
     }
     return render(request, 'teacher/index.html', context)
@@ -111,7 +112,7 @@ def teacher_dashboard(request):
 # Courses
 @teacher_required
 def teacher_courses(request):
-    courses = Course.objects.filter(teacher=request.user).prefetch_related('students', 'lessons')
+    courses = Course.objects.filter(teacher=request.user).select_related('category').defer(*Course.LIST_DEFERRED)
     return render(request, 'teacher/courses.html', {'courses': courses})
 
 @teacher_required
@@ -142,7 +143,8 @@ def create_course(request):
 @teacher_required
 def course_detail(request, course_id):
     course = get_object_or_404(Course, id=course_id, teacher=request.user)
-    return render(request, 'teacher/course_detail.html', {'course': course})
+    lessons = course.lessons.only('id', 'course_id', 'order', 'title', 'video_url', 'presentation_file')
+    return render(request, 'teacher/course_detail.html', {'course': course, 'lessons': lessons})
 
 @teacher_required
 def edit_course(request, course_id):
@@ -286,52 +288,9 @@ def add_test(request, course_id):
 
     if request.method == 'POST':
         try:
-            test = CourseTest()
-            test.course = course
-            test.title = request.POST.get('title')
-            test.description = request.POST.get('description', '')
-
-            time_limit = request.POST.get('time_limit_minutes')
-            if time_limit:
-                test.time_limit_minutes = int(time_limit)
-
-            test.passing_score = float(request.POST.get('passing_score', 50))
-            test.save()
-
-            question_nums = set()
-            for key in request.POST.keys():
-                if key.startswith('question_text_'):
-                    question_nums.add(key.split('_')[-1])
-
-            for order, q_num in enumerate(sorted(question_nums), start=1):
-                question_text = request.POST.get(f'question_text_{q_num}')
-                if not question_text:
-                    continue
-
-                question = TestQuestion()
-                question.test = test
-                question.order = order
-                question.question_text = question_text
-                question.save()
-
-                correct_answers = request.POST.getlist(f'correct_answer_{q_num}')
-
-                answer_order = 1
-                for key in request.POST.keys():
-                    if key.startswith(f'answer_{q_num}_'):
-                        answer_text = request.POST.get(key)
-                        if answer_text:
-                            answer_num = key.split('_')[-1]
-
-                            answer = TestAnswer()
-                            answer.question = question
-                            answer.order = answer_order
-                            answer.answer_text = answer_text
-                            answer.is_correct = answer_num in correct_answers
-                            answer.save()
-
-                            answer_order += 1
+            test = authoring.save_test(CourseTest(course=course), request.POST)
 
+            grading.invalidate(test.id)
             messages.success(request, 'Test yaratildi!')
             return redirect('teacher:course_detail', course_id=course.id)
 
@@ -346,81 +305,38 @@ def edit_test(request, test_id):
 
     if request.method == 'POST':
         try:
-            test.title = request.POST.get('title')
-            test.description = request.POST.get('description', '')
-
-            time_limit = request.POST.get('time_limit_minutes')
-            test.time_limit_minutes = int(time_limit) if time_limit else None
-
-            test.passing_score = float(request.POST.get('passing_score', 50))
-            test.save()
-
-            deleted_questions = request.POST.getlist('deleted_questions')
-            if deleted_questions:
-                TestQuestion.objects.filter(id__in=deleted_questions).delete()
-
-            deleted_answers = request.POST.getlist('deleted_answers')
-            if deleted_answers:
-                TestAnswer.objects.filter(id__in=deleted_answers).delete()
-
-            question_nums = set()
-            for key in request.POST.keys():
-                if key.startswith('question_text_'):
-                    question_nums.add(key.split('_')[-1])
-
-            for order, q_num in enumerate(sorted(question_nums), start=1):
-                question_text = request.POST.get(f'question_text_{q_num}')
-                if not question_text:
-                    continue
-
-                question_id = request.POST.get(f'question_id_{q_num}')
-
-                if question_id:
-                    question = TestQuestion.objects.get(id=question_id)
-                    question.question_text = question_text
-                    question.order = order
-                    question.save()
-                else:
-                    question = TestQuestion()
-                    question.test = test
-                    question.order = order
-                    question.question_text = question_text
-                    question.save()
-
-                correct_answers = request.POST.getlist(f'correct_answer_{q_num}')
-
-                answer_order = 1
-                for key in request.POST.keys():
-                    if key.startswith(f'answer_{q_num}_'):
-                        answer_text = request.POST.get(key)
-                        if answer_text:
-                            answer_num = key.split('_')[-1]
-                            answer_id = request.POST.get(f'answer_id_{q_num}_{answer_num}')
-
-                            if answer_id:
-                                answer = TestAnswer.objects.get(id=answer_id)
-                                answer.answer_text = answer_text
-                                answer.order = answer_order
-                                answer.is_correct = answer_num in correct_answers
-                                answer.save()
-                            else:
-                                answer = TestAnswer()
-                                answer.question = question
-                                answer.order = answer_order
-                                answer.answer_text = answer_text
-                                answer.is_correct = answer_num in correct_answers
-                                answer.save()
-
-                            answer_order += 1
-
-            messages.success(request, 'Test yangilandi!')
-            return redirect('teacher:course_detail', course_id=test.course.id)
+            # The edit and the re-grade succeed or fail together
+            with transaction.atomic():
+                authoring.save_test(test, request.POST)
+
+                grading.invalidate(test.id)
+                # Correct answers may have changed - re-grade every stored attempt
+                regraded, skipped = regrade.regrade_test(test.id)
+            if regraded:
+                messages.success(request, f'Test yangilandi! {regraded} ta natija qayta baholandi.')
+            else:
+                messages.success(request, 'Test yangilandi!')
+            if skipped:
+                messages.warning(request, f'{skipped} ta eski natijaning javoblari saqlanmagan - ular qayta baholanmadi.')
+            return redirect('teacher:course_detail', course_id=test.course_id)
 
         except Exception as e:
             messages.error(request, f'Xatolik: {str(e)}')
 
     return render(request, 'teacher/edit_test.html', {'test': test})
 
+@teacher_required
+def test_analysis(request, test_id):
+    test = get_object_or_404(CourseTest.objects.select_related('course'), id=test_id, course__teacher=request.user)
+    analysis = item_analysis.get_analysis(test.id)
+    return render(request, 'teacher/test_analysis.html', {
+        'test': test,
+        'attempts': analysis['attempts'],
+        # Reports cached before the count was added have no 'excluded'
+        'excluded': analysis.get('excluded', 0),
+        'questions': analysis['questions'],
+    })
+
 @teacher_required
 def delete_test(request, test_id):
     if request.method == 'POST':
@@ -435,11 +351,14 @@ def teacher_students(request):
     courses = Course.objects.filter(teacher=request.user)
     students = CourseStudent.objects.filter(course__teacher=request.user).select_related('user', 'course')
     total_students = students.values('user').distinct().count()
+    students = list(students)
+    avg_progress = completion.attach(students)
 
     return render(request, 'teacher/students.html', {
         'courses': courses,
         'students': students,
         'total_students': total_students,
+        'avg_progress': avg_progress,
     })
 
 @teacher_required